@@ -1,6 +1,11 @@
 #!/usr/bin/python
 # -*- coding: UTF-8 -*-
+import  argparse
+import  hashlib
+import  json
 import  math
+import  os
+import  struct
 from itertools import combinations, permutations
 
 # references: 
@@ -831,7 +836,7 @@ def gen_modified_mc_lut_case4E(indices):
     min_eindex, eindices = query_closest_edge(min_eindex, eindices)
     used_eindices.append(min_eindex)
     triangles.extend(gen_triangle_indices(used_eindices, indices))
-    used_eindices.pop(0)
+    used_eindices.pop(1)
 
     min_eindex, eindices = query_closest_edge(min_eindex, eindices)
     used_eindices.append(min_eindex)
@@ -1025,6 +1030,327 @@ def gen_modified_mc_lut_case7(indices):
         print("gen_modified_mc_lut_case7!fatal error, triangle count=%d"%(len(triangles) / 3))
     return triangle_indices_fill(triangles)
 
+'''
+    通用等值线环追踪三角化(与具体配置无关):
+    1. 每个面上的被切边两两连成线段, 2条被切边直接相连;
+       4条被切边为歧义面, 由 ambiguity_rule(value, findex) 决定:
+       返回True时连通面上置位的两个角点(线段绕开未置位角点), 否则分离置位角点;
+    2. 每条被切边恰好属于两个面, 线段首尾相接形成若干闭合环;
+    3. 环的方向取使法线从置位顶点指向未置位顶点(与 gen_triangle_indices__ 的判定一致);
+    4. 每个环按最短对角线贪心切耳三角化.
+    新的歧义规则只需提供新的 ambiguity_rule, 不需要新的 case 函数.
+'''
+face2edge = [[eindex for eindex in range(12) if set(edge2vertex[eindex]) <= set(facets[findex])] for findex in range(6)]
+
+def ambiguity_connect_inside(value, findex):
+    return True
+
+def ambiguity_separate_inside(value, findex):
+    return False
+
+def face_gen_segments(value, ebits, findex, ambiguity_rule=ambiguity_connect_inside):
+    eindices = [eindex for eindex in face2edge[findex] if ebits[eindex]]
+    if len(eindices) == 2:
+        return [(eindices[0], eindices[1])]
+    if len(eindices) == 4:
+        connect_inside = ambiguity_rule(value, findex)
+        segments = []
+        for vindex in facets[findex]:
+            if bool(has_bit(value, vindex)) != connect_inside:
+                segments.append(tuple(edge_query_edge_indices_from_vertex_indice(eindices, vindex)))
+        return segments
+    return []
+
+def facet_center(findex):
+    # 立方体以原点为中心, 面中心即面的外法线方向
+    C = (0.0, 0.0, 0.0)
+    for vindex in facets[findex]:
+        V = vertices[vindex]
+        C = (C[0] + V[0] / 4.0, C[1] + V[1] / 4.0, C[2] + V[2] / 4.0)
+    return C
+
+'''
+    按环上每一段所在的面判断走向: 面内沿外法线右手侧应为置位角点一侧.
+    逐段累加而非用整个环的面积向量, 鞍形的环(歧义面一连一断时)面积向量可能接近零或反向.
+'''
+def loop_orient(value, loop):
+    score = 0.0
+    for i in range(len(loop)):
+        eindex0 = loop[i]
+        eindex1 = loop[(i + 1) % len(loop)]
+        for findex in range(6):
+            if eindex0 in face2edge[findex] and eindex1 in face2edge[findex]:
+                break
+        P0 = gen_midpoint_from_edge_index(eindex0)
+        P1 = gen_midpoint_from_edge_index(eindex1)
+        side = cross(subtract(P1, P0), facet_center(findex))
+        for eindex in (eindex0, eindex1):
+            vindex0, vindex1 = edge2vertex[eindex]
+            if has_bit(value, vindex0):
+                D = subtract(vertices[vindex1], vertices[vindex0])
+            else:
+                D = subtract(vertices[vindex0], vertices[vindex1])
+            score += dot(side, D)
+    if score > 0:
+        return list(reversed(loop))
+    return loop
+
+def trace_isosurface_loops(value, ambiguity_rule=ambiguity_connect_inside):
+    ebits = edge_gen_bits(value)
+    neighbors = {}
+    for eindex in edge_gen_edge_indices(ebits):
+        neighbors[eindex] = []
+    for findex in range(6):
+        for eindex0, eindex1 in face_gen_segments(value, ebits, findex, ambiguity_rule):
+            neighbors[eindex0].append(eindex1)
+            neighbors[eindex1].append(eindex0)
+
+    loops = []
+    visited = []
+    for start in sorted(neighbors.keys()):
+        if start in visited:
+            continue
+        if len(neighbors[start]) != 2:
+            print("trace_isosurface_loops!fatal error, value={value}, edge {eindex} neighbors={neighbors}".format(value=value, eindex=start, neighbors=neighbors[start]))
+            return []
+        loop = [start]
+        visited.append(start)
+        prev_eindex = start
+        eindex = neighbors[start][0]
+        while eindex != start:
+            loop.append(eindex)
+            visited.append(eindex)
+            next_eindex = neighbors[eindex][0] if neighbors[eindex][0] != prev_eindex else neighbors[eindex][1]
+            prev_eindex = eindex
+            eindex = next_eindex
+        loops.append(loop_orient(value, loop))
+    return loops
+
+def is_same_face_from_edge_index_2(eindex1, eindex2):
+    for findex in range(6):
+        if eindex1 in face2edge[findex] and eindex2 in face2edge[findex]:
+            return True
+    return False
+
+'''
+    切耳时避开落在立方体面上的对角线: 相邻单元格在同一个面上可能选到同一条对角线,
+    两张曲面会在该面上重合(非流形边)
+'''
+def triangulate_loop(loop):
+    loop = list(loop)
+    source = list(loop)
+    triangles = []
+    while len(loop) > 3:
+        min_dist = None
+        min_index = None
+        for i in range(len(loop)):
+            eindex0 = loop[i - 1]
+            eindex1 = loop[(i + 1) % len(loop)]
+            dist = length(subtract(gen_midpoint_from_edge_index(eindex0), gen_midpoint_from_edge_index(eindex1)))
+            if is_same_face_from_edge_index_2(eindex0, eindex1):
+                dist += 100.0
+            if min_dist == None or dist < min_dist - 1e-9:
+                min_dist = dist
+                min_index = i
+        if min_dist >= 100.0:
+            # 贪心切耳走进了死角(长环, 歧义面一连一断时出现), 改用全局最优三角化
+            return triangulate_loop_min_weight(source)
+        triangles.extend([loop[min_index - 1], loop[min_index], loop[(min_index + 1) % len(loop)]])
+        loop.pop(min_index)
+    triangles.extend(loop)
+    return triangles
+
+'''
+    凸多边形最小权三角化的动态规划, 权为对角线长度, 落在同一个面上的对角线加 100;
+    midpoint / same_face 给出边中点和两边是否共面, 默认是立方体, 过渡单元传入自己的几何
+'''
+def triangulate_loop_min_weight(loop, midpoint=gen_midpoint_from_edge_index, same_face=is_same_face_from_edge_index_2):
+    n = len(loop)
+    def weight(i, j):
+        if j - i == 1 or (i == 0 and j == n - 1):
+            return 0.0
+        dist = length(subtract(midpoint(loop[i]), midpoint(loop[j])))
+        if same_face(loop[i], loop[j]):
+            dist += 100.0
+        return dist
+    cost = {}
+    split = {}
+    for gap in range(2, n):
+        for i in range(n - gap):
+            j = i + gap
+            for k in range(i + 1, j):
+                c = cost.get((i, k), 0.0) + cost.get((k, j), 0.0) + weight(i, k) + weight(k, j)
+                if (i, j) not in cost or c < cost[(i, j)] - 1e-9:
+                    cost[(i, j)] = c
+                    split[(i, j)] = k
+    triangles = []
+    stack = [(0, n - 1)]
+    while stack:
+        i, j = stack.pop()
+        if j - i < 2:
+            continue
+        k = split[(i, j)]
+        triangles.extend([loop[i], loop[k], loop[j]])
+        stack.append((i, k))
+        stack.append((k, j))
+    return triangles
+
+def gen_triangle_table_from_loops(value, ambiguity_rule=ambiguity_connect_inside):
+    triangles = []
+    for loop in trace_isosurface_loops(value, ambiguity_rule):
+        triangles.extend(triangulate_loop(loop))
+    if len(triangles) > 15:
+        print("gen_triangle_table_from_loops!fatal error, value={value}, triangle count={count}".format(value=value, count=len(triangles) // 3))
+        return gen_modified_mc_lut_case0(indices_from_bit(value))
+    return triangle_indices_fill(triangles)
+
+'''
+    按 gen_modified_mc_lut_caseXX 的分类命名配置, 用于统计
+'''
+def classify_case(indices):
+    total_indices = len(indices)
+    ebits = edge_gen_bits_from_vertex_indices(indices)
+    cut_count = edge_cut_count(ebits)
+    two_cut_count = 0
+    for i in range(len(indices)):
+        if edge_is_two_cut(ebits, indices[i])[0]:
+            two_cut_count += 1
+    if 1 == total_indices:
+        return "1"
+    elif 2 == total_indices:
+        if 4 == cut_count:
+            return "2A"
+        elif 6 == cut_count:
+            return "2B" if is_same_face_from_vertex_index_2(indices[0], indices[1]) else "2C"
+    elif 3 == total_indices:
+        if 5 == cut_count:
+            return "3A"
+        elif 7 == cut_count:
+            return "3B"
+        elif 9 == cut_count:
+            return "3C"
+    elif 4 == total_indices:
+        if 4 == cut_count:
+            return "4A"
+        elif 6 == cut_count:
+            if 3 == two_cut_count:
+                return "4B"
+            elif 2 == two_cut_count:
+                return "4D"
+        elif 8 == cut_count:
+            if 4 == two_cut_count:
+                return "4C"
+            elif 2 == two_cut_count:
+                return "4E"
+        elif 12 == cut_count:
+            return "4F"
+    elif 5 == total_indices:
+        if 5 == cut_count:
+            return "5A"
+        elif 7 == cut_count:
+            return "5B"
+        elif 9 == cut_count:
+            return "5C"
+    elif 6 == total_indices:
+        if 4 == cut_count:
+            return "6A"
+        elif 6 == cut_count:
+            for vi1, vi2, vi3, vi4 in combinations(indices, 4):
+                if is_same_face_from_vertex_index_4(vi1, vi2, vi3, vi4):
+                    return "6B"
+            return "6C"
+    elif 7 == total_indices:
+        if 3 == cut_count:
+            return "7"
+    else:
+        return "0"
+    print("classify_case!fatal error, indices={indices}, cut_count={cut_count}".format(indices=indices, cut_count=cut_count))
+    return None
+
+case_names = ["0", "1", "2A", "2B", "2C", "3A", "3B", "3C", "4A", "4B", "4C", "4D", "4E", "4F", "5A", "5B", "5C", "6A", "6B", "6C", "7"]
+
+case_generators = {
+    "0": gen_modified_mc_lut_case0,
+    "1": gen_modified_mc_lut_case1,
+    "2A": gen_modified_mc_lut_case2A,
+    "2B": gen_modified_mc_lut_case2B,
+    "2C": gen_modified_mc_lut_case2C,
+    "3A": gen_modified_mc_lut_case3A,
+    "3B": gen_modified_mc_lut_case3B,
+    "3C": gen_modified_mc_lut_case3C,
+    "4A": gen_modified_mc_lut_case4A,
+    "4B": gen_modified_mc_lut_case4B,
+    "4C": gen_modified_mc_lut_case4C,
+    "4D": gen_modified_mc_lut_case4D,
+    "4E": gen_modified_mc_lut_case4E,
+    "4F": gen_modified_mc_lut_case4F,
+    "5A": gen_modified_mc_lut_case5A,
+    "5B": gen_modified_mc_lut_case5B,
+    "5C": gen_modified_mc_lut_case5C,
+    "6A": gen_modified_mc_lut_case6A,
+    "6B": gen_modified_mc_lut_case6B,
+    "6C": gen_modified_mc_lut_case6C,
+    "7": gen_modified_mc_lut_case7,
+}
+
+'''
+    Marching Squares 查找表: 正方形角点 0..3 = (0,0) (1,0) (1,1) (0,1), 边 0..3 = 01 12 23 30.
+    直接借用立方体 z = -1 的面和 face_gen_segments 生成线段, 歧义时的连接方式与三维表在面上的交线一致,
+    所以二维切片的等值线与三维网格在网格平面上的截线重合.
+    线段走向: 沿线段方向的右手侧为数值增大(未置位)的一侧.
+'''
+square_vertices = [(0, 0), (1, 0), (1, 1), (0, 1)]
+
+square_edge2vertex = [(0, 1), (1, 2), (2, 3), (3, 0)]
+
+def square_facet_mapping():
+    # 返回 z = -1 的面编号, 正方形角点 -> 立方体顶点, 立方体边 -> 正方形边
+    square2vertex = [vertices.index((2.0 * x - 1.0, 2.0 * y - 1.0, -1.0)) for x, y in square_vertices]
+    for findex in range(6):
+        if sorted(facets[findex]) == sorted(square2vertex):
+            break
+    edge2square = {}
+    for sindex in range(4):
+        v0, v1 = square_edge2vertex[sindex]
+        pair = sorted([square2vertex[v0], square2vertex[v1]])
+        for eindex in range(12):
+            if sorted(edge2vertex[eindex]) == pair:
+                edge2square[eindex] = sindex
+    return findex, square2vertex, edge2square
+
+def square_midpoint(sindex):
+    v0, v1 = square_edge2vertex[sindex]
+    return ((square_vertices[v0][0] + square_vertices[v1][0]) / 2.0, (square_vertices[v0][1] + square_vertices[v1][1]) / 2.0)
+
+def square_segment_orient(value, sindex0, sindex1):
+    P0 = square_midpoint(sindex0)
+    P1 = square_midpoint(sindex1)
+    right = (P1[1] - P0[1], P0[0] - P1[0])
+    score = 0.0
+    for sindex in (sindex0, sindex1):
+        v0, v1 = square_edge2vertex[sindex]
+        if has_bit(value, v0):
+            v0, v1 = v1, v0
+        # v0 -> v1: 未置位 -> 置位
+        score += right[0] * (square_vertices[v0][0] - square_vertices[v1][0]) + right[1] * (square_vertices[v0][1] - square_vertices[v1][1])
+    if score < 0:
+        return [sindex1, sindex0]
+    return [sindex0, sindex1]
+
+def generate_square_tables(ambiguity_rule=ambiguity_connect_inside):
+    findex, square2vertex, edge2square = square_facet_mapping()
+    square_tables = []
+    for value in range(16):
+        cube_value = 0
+        for vindex in range(4):
+            if has_bit(value, vindex):
+                cube_value |= 1 << square2vertex[vindex]
+        segments = []
+        for eindex0, eindex1 in face_gen_segments(cube_value, edge_gen_bits(cube_value), findex, ambiguity_rule):
+            segments.extend(square_segment_orient(value, edge2square[eindex0], edge2square[eindex1]))
+        square_tables.append(segments + [-1 for i in range(5 - len(segments))])
+    return square_tables
+
 def generate_edge_tables():
     edge_tables = []
     for i in range(256):
@@ -1032,159 +1358,551 @@ def generate_edge_tables():
         edge_tables.append(edge_gen_number(ebits))
     return edge_tables
 
-def generate_triangle_tables():
+'''
+    method="loops": 通用环追踪(默认), 所有歧义面按 ambiguity_rule 一致处理;
+    method="cases": 原有的逐 case 几何启发式, 保留作对照,
+        其中 case 4E 在歧义面上分离了置位顶点, 与其它 case 不一致, 相邻单元格间会出现裂缝.
+'''
+def generate_triangle_tables(verbose=True, method="loops", ambiguity_rule=ambiguity_connect_inside):
     triangle_tables = []
-    total_count_case0 = 0
-    total_count_case1 = 0
-    total_count_case2A = 0
-    total_count_case2B = 0
-    total_count_case2C = 0
-    total_count_case3A = 0
-    total_count_case3B = 0
-    total_count_case3C = 0
-    total_count_case4A = 0
-    total_count_case4B = 0
-    total_count_case4C = 0
-    total_count_case4D = 0
-    total_count_case4E = 0
-    total_count_case4F = 0
-    total_count_case5A = 0
-    total_count_case5B = 0
-    total_count_case5C = 0
-    total_count_case6A = 0
-    total_count_case6B = 0
-    total_count_case6C = 0
-    total_count_case7 = 0
+    total_counts = dict([(name, 0) for name in case_names])
     for i in range(256):
         indices = indices_from_bit(i)
-        if i == 5:
-            vi = 2;
-        total_indices = len(indices)
-        ebits = edge_gen_bits_from_vertex_indices(indices)
-        cut_count = edge_cut_count(ebits)
-        if 1 == total_indices: # case 1
-            total_count_case1 += 1
-            triangle_tables.append(gen_modified_mc_lut_case1(indices))
-        elif 2 == total_indices: # case 2A/2B/2C
-            if 4 == cut_count: # case 2A
-                total_count_case2A += 1
-                triangle_tables.append(gen_modified_mc_lut_case2A(indices))
-            elif 6 == cut_count:
-                if is_same_face_from_vertex_index_2(indices[0], indices[1]): # case 2B
-                    total_count_case2B += 1
-                    triangle_tables.append(gen_modified_mc_lut_case2B(indices))
-                else: # case 2C
-                    total_count_case2C += 1
-                    triangle_tables.append(gen_modified_mc_lut_case2C(indices))
-            else:
-                print("generate_triangle_tables!case 2X fatal error, cut_count={cut_count}".format(cut_count=cut_count))
-        elif 3 == total_indices: # case 3A/3B/3C
-            if 5 == cut_count: # case 3A
-                total_count_case3A += 1
-                triangle_tables.append(gen_modified_mc_lut_case3A(indices))
-            elif 7 == cut_count: # case 3B
-                total_count_case3B += 1
-                triangle_tables.append(gen_modified_mc_lut_case3B(indices))
-            elif 9 == cut_count: # case 3C
-                total_count_case3C += 1
-                triangle_tables.append(gen_modified_mc_lut_case3C(indices))
-            else:
-                print("generate_triangle_tables!case 3X fatal error, cut_count={cut_count}".format(cut_count=cut_count))
-        elif 4 == total_indices: # case 4A/4B/4C/4D/4F
-            if 4 == cut_count: # case 4A
-                total_count_case4A += 1
-                triangle_tables.append(gen_modified_mc_lut_case4A(indices))
-            elif 6 == cut_count: # case 4B/4D/4E
-                two_cut_count = 0
-                for i in range(len(indices)):
-                    edges = vertex2edge[indices[i]]
-                    if ebits[edges[0]] + ebits[edges[1]] + ebits[edges[2]] == 2:
-                        two_cut_count += 1
-                if 3 == two_cut_count: # case 4B
-                    total_count_case4B += 1
-                    triangle_tables.append(gen_modified_mc_lut_case4B(indices))
-                elif 2 == two_cut_count: # case 4D
-                    total_count_case4D += 1
-                    triangle_tables.append(gen_modified_mc_lut_case4D(indices))
-            elif 8 == cut_count: # case 4C/4E
-                two_cut_count = 0
-                for i in range(len(indices)):
-                    edges = vertex2edge[indices[i]]
-                    if ebits[edges[0]] + ebits[edges[1]] + ebits[edges[2]] == 2:
-                        two_cut_count += 1
-                if 4 == two_cut_count:
-                    total_count_case4C += 1
-                    triangle_tables.append(gen_modified_mc_lut_case4C(indices))
-                elif 2 == two_cut_count: # case 4E
-                    total_count_case4E += 1
-                    triangle_tables.append(gen_modified_mc_lut_case4E(indices))
-            elif 12 == cut_count: # case 4F
-                total_count_case4F += 1
-                triangle_tables.append(gen_modified_mc_lut_case4F(indices))
-            else:
-                print("generate_triangle_tables!case 4X fatal error, cut_count={cut_count}".format(cut_count=cut_count))
-        elif 5 == total_indices: # case 5A/5B/5C
-            if 5 == cut_count: # case 5A
-                total_count_case5A += 1
-                triangle_tables.append(gen_modified_mc_lut_case5A(indices))
-            elif 7 == cut_count: # case 5B
-                total_count_case5B += 1
-                triangle_tables.append(gen_modified_mc_lut_case5B(indices))
-            elif 9 == cut_count: # case 5C
-                total_count_case5C += 1
-                triangle_tables.append(gen_modified_mc_lut_case5C(indices))
-            else:
-                print("generate_triangle_tables!case 5X fatal error, cut_count={cut_count}".format(cut_count=cut_count))
-        elif 6 == total_indices: # case 6A/6B/6C
-            if 4 == cut_count: # case 6A
-                total_count_case6A += 1
-                triangle_tables.append(gen_modified_mc_lut_case6A(indices))
-            elif 6 == cut_count: # case 6B/6C
-                is_same_facet_4 = False
-                for vi1, vi2, vi3, vi4 in combinations(indices, 4):
-                    if is_same_face_from_vertex_index_4(vi1, vi2, vi3, vi4):
-                        is_same_facet_4 = True
-                        break
-                if is_same_facet_4:
-                    total_count_case6B += 1
-                    triangle_tables.append(gen_modified_mc_lut_case6B(indices))
-                else:
-                    total_count_case6C += 1
-                    triangle_tables.append(gen_modified_mc_lut_case6C(indices))
+        name = classify_case(indices)
+        if name == None:
+            triangle_tables.append(gen_modified_mc_lut_case0(indices))
+            continue
+        total_counts[name] += 1
+        if method == "cases":
+            triangle_tables.append(case_generators[name](indices))
+        else:
+            triangle_tables.append(gen_triangle_table_from_loops(i, ambiguity_rule))
+
+    if not verbose:
+        return triangle_tables
+    for name in case_names:
+        print("total_case%s: %d"%(name, total_counts[name]))
+    return triangle_tables
+
+'''
+    扩展表: 按 (配置, 歧义面位) 索引, 歧义面位第 findex 位为1表示该面上连通置位角点.
+    ambiguous_faces[value] 为该配置的歧义面(面上置位角点在对角线上)列表,
+    非歧义面的位不起作用, 查表前需按 ambiguous_faces 屏蔽.
+    表项中的 center_vertex_index 表示单元格中心顶点.
+    只消除面歧义; 体内部歧义(如 4F 的隧道)仍按环追踪的隐式结果.
+'''
+def gen_ambiguous_faces(value):
+    faces = []
+    for findex in range(6):
+        bits = [1 if has_bit(value, vindex) else 0 for vindex in facets[findex]]
+        if bits == [1, 0, 1, 0] or bits == [0, 1, 0, 1]:
+            faces.append(findex)
+    return faces
+
+def make_face_bits_ambiguity_rule(face_bits):
+    def ambiguity_rule(value, findex):
+        return bool((face_bits >> findex) & 1)
+    return ambiguity_rule
+
+# 单元格中心顶点的编号, 接在12条边之后
+center_vertex_index = 12
+
+def triangulation_has_facet_diagonal(loop, triangles):
+    segments = []
+    for i in range(len(loop)):
+        segments.append(sorted([loop[i], loop[(i + 1) % len(loop)]]))
+    for i in range(0, len(triangles), 3):
+        for j in range(3):
+            eindex0 = triangles[i + j]
+            eindex1 = triangles[i + (j + 1) % 3]
+            if sorted([eindex0, eindex1]) not in segments and is_same_face_from_edge_index_2(eindex0, eindex1):
+                return True
+    return False
+
+'''
+    歧义面一连一断时会出现穿过同一个面两次的长环, 任意三角化都要用到落在面上的对角线,
+    此时改为围绕单元格中心顶点(center_vertex_index)做扇形, 与 MC33 处理隧道的方式相同
+'''
+def triangulate_loop_with_center(loop):
+    triangles = triangulate_loop(loop)
+    if not triangulation_has_facet_diagonal(loop, triangles):
+        return triangles
+    triangles = []
+    for i in range(len(loop)):
+        triangles.extend([loop[i], loop[(i + 1) % len(loop)], center_vertex_index])
+    return triangles
+
+def generate_extended_triangle_tables():
+    ambiguous_faces = []
+    rows = []
+    for value in range(256):
+        ambiguous_faces.append(gen_ambiguous_faces(value))
+        for face_bits in range(64):
+            triangles = []
+            for loop in trace_isosurface_loops(value, make_face_bits_ambiguity_rule(face_bits)):
+                triangles.extend(triangulate_loop_with_center(loop))
+            rows.append(triangles)
+    width = max([len(row) for row in rows]) + 1
+    extended_tables = [row + [-1 for i in range(width - len(row))] for row in rows]
+    return ambiguous_faces, extended_tables
+
+'''
+    最少三角形三角化搜索:
+    1. 候选歧义规则: 面上的连通选择只能取决于 (面的轴向, 置位对角线), 共 2^6 种规则,
+       这样相邻单元格从两侧看到的同一个面总是同样的连接, 不会产生裂缝;
+       只保留所有配置都不超过5个三角形(16项一行)的规则;
+    2. 每个环穷举全部三角化(不使用落在立方体面上的对角线), 按 (三角形数, -最小角, 面积) 取最优;
+    3. 规则按 weights(每种配置的出现次数, 默认全1) 加权的三角形总数评分, 相同时比较最差最小角.
+'''
+def make_axis_ambiguity_rule(bits):
+    def ambiguity_rule(value, findex):
+        axis = findex // 2
+        # 面内坐标最小的角点, 相邻单元格的对面上是同一个网格点
+        min_vindex = min(facets[findex], key=lambda vindex: [vertices[vindex][k] for k in range(3) if k != axis])
+        pattern = 1 if has_bit(value, min_vindex) else 0
+        return bool((bits >> (axis * 2 + pattern)) & 1)
+    return ambiguity_rule
+
+def triangle_min_angle(eindices):
+    points = [gen_midpoint_from_edge_index(eindex) for eindex in eindices]
+    min_angle = None
+    for i in range(3):
+        P0 = points[i]
+        v1 = subtract(points[(i + 1) % 3], P0)
+        v2 = subtract(points[(i + 2) % 3], P0)
+        cos_angle = dot(v1, v2) / (length(v1) * length(v2))
+        angle = math.degrees(math.acos(max(-1.0, min(1.0, cos_angle))))
+        if min_angle == None or angle < min_angle:
+            min_angle = angle
+    return min_angle
+
+def triangle_area(eindices):
+    P0 = gen_midpoint_from_edge_index(eindices[0])
+    P1 = gen_midpoint_from_edge_index(eindices[1])
+    P2 = gen_midpoint_from_edge_index(eindices[2])
+    return length(cross(subtract(P1, P0), subtract(P2, P0))) / 2.0
+
+def triangulation_score(triangles):
+    count = len(triangles) // 3
+    min_angle = 180.0
+    area = 0.0
+    for i in range(count):
+        min_angle = min(min_angle, triangle_min_angle(triangles[i*3:i*3+3]))
+        area += triangle_area(triangles[i*3:i*3+3])
+    return (count, -min_angle, area)
+
+def enumerate_loop_triangulations(loop):
+    # 三角形 (loop[0], loop[k], loop[-1]) 把环分成左右两个子环, 顶点保持环内顺序所以绕向不变
+    if len(loop) < 3:
+        return [[]]
+    if len(loop) == 3:
+        return [list(loop)]
+    results = []
+    for k in range(1, len(loop) - 1):
+        if k > 1 and is_same_face_from_edge_index_2(loop[0], loop[k]):
+            continue
+        if k < len(loop) - 2 and is_same_face_from_edge_index_2(loop[k], loop[-1]):
+            continue
+        for left in enumerate_loop_triangulations(loop[:k + 1]):
+            for right in enumerate_loop_triangulations(loop[k:]):
+                results.append(left + [loop[0], loop[k], loop[-1]] + right)
+    return results
+
+def gen_best_loop_triangulation(loop):
+    best = None
+    best_score = None
+    for triangles in enumerate_loop_triangulations(loop):
+        score = triangulation_score(triangles)
+        if best_score == None or score < best_score:
+            best = triangles
+            best_score = score
+    if best == None:
+        return triangulate_loop(loop)
+    return best
+
+def table_triangle_count(triangles):
+    return len([eindex for eindex in triangles if eindex >= 0]) // 3
+
+def table_min_angle(triangles):
+    # 空配置(case 0)没有三角形, 返回 None
+    triangles = [eindex for eindex in triangles if eindex >= 0]
+    if len(triangles) == 0:
+        return None
+    return -triangulation_score(triangles)[1]
+
+def format_min_angle(angles):
+    angles = [angle for angle in angles if angle != None]
+    return "%.1f"%min(angles) if angles else "n/a"
+
+def optimize_triangle_tables(weights=None, verbose=True):
+    if weights == None:
+        weights = [1 for i in range(256)]
+    best_tables = None
+    best_bits = None
+    best_score = None
+    # 从 63(全部连通置位顶点, 即默认规则)开始, 评分相同时保留默认规则
+    for bits in range(63, -1, -1):
+        ambiguity_rule = make_axis_ambiguity_rule(bits)
+        all_loops = [trace_isosurface_loops(value, ambiguity_rule) for value in range(256)]
+        fits = True
+        for value in range(256):
+            if sum([len(loop) - 2 for loop in all_loops[value]]) > 5:
+                fits = False
+                break
+        if not fits:
+            continue
+        triangle_tables = []
+        for value in range(256):
+            triangles = []
+            for loop in all_loops[value]:
+                triangles.extend(gen_best_loop_triangulation(loop))
+            triangle_tables.append(triangle_indices_fill(triangles))
+        total = sum([weights[value] * table_triangle_count(triangle_tables[value]) for value in range(256)])
+        worst_angle = min([angle for angle in [table_min_angle(triangle_tables[value]) for value in range(256)] if angle != None])
+        score = (total, -worst_angle)
+        if best_score == None or score < best_score:
+            best_tables = triangle_tables
+            best_bits = bits
+            best_score = score
+
+    baseline = generate_triangle_tables(verbose=False)
+    report = []
+    for value in range(256):
+        report.append({
+            "value": value,
+            "case": classify_case(indices_from_bit(value)),
+            "triangles_before": table_triangle_count(baseline[value]),
+            "triangles_after": table_triangle_count(best_tables[value]),
+            "min_angle_before": table_min_angle(baseline[value]),
+            "min_angle_after": table_min_angle(best_tables[value]),
+        })
+
+    if verbose:
+        print("optimize_triangle_tables: ambiguity rule bits={bits}, weighted triangles {before} -> {after}".format(
+            bits=best_bits,
+            before=sum([weights[item["value"]] * item["triangles_before"] for item in report]),
+            after=best_score[0]))
+        for name in case_names:
+            items = [item for item in report if item["case"] == name]
+            saved = sum([weights[item["value"]] * (item["triangles_before"] - item["triangles_after"]) for item in items])
+            angle_before = format_min_angle([item["min_angle_before"] for item in items])
+            angle_after = format_min_angle([item["min_angle_after"] for item in items])
+            print("case%s: saved triangles %d, min angle %s -> %s"%(name, saved, angle_before, angle_after))
+    return best_tables, report
+
+'''
+    Transvoxel 风格过渡单元(2:1 分辨率边界):
+    高分辨率面(z=0)上 3x3 个采样点 0..8 (编号 i + 3*j), 低分辨率面(z=1)上4个角点 9..12,
+    取值与高分辨率面的角点 0, 2, 6, 8 相同, 因此配置索引只有9位(512种).
+         6-----7-----8          11-----------12
+         |     |     |           |            |
+         3-----4-----5           |            |
+         |     |     |           |            |
+         0-----1-----2           9-----------10
+          高分辨率面 z=0            低分辨率面 z=1
+    可被切割的边: 0..11 为高分辨率边, 12..15 为低分辨率边;
+    侧面上连接高低分辨率角点的竖边两端取值相同, 永远不会被切割.
+    与立方体相同按面追踪闭合环: 4个高分辨率子面和低分辨率面上的歧义由 ambiguity_rule 决定,
+    与相邻普通单元格的面一致; 侧面是五边形, 最多2个切点, 没有歧义.
+    ambiguity_rule 按立方体的面编号和角点位读取, 调用前由 transition_facet_cube_face 换算;
+    模型坐标轴与立方体坐标轴相同, 依赖轴向的规则用于其它朝向的过渡面时需要按该朝向换算后的规则生成表.
+'''
+transition_vertices = [
+    (0.0, 0.0, 0.0), (1.0, 0.0, 0.0), (2.0, 0.0, 0.0),
+    (0.0, 1.0, 0.0), (1.0, 1.0, 0.0), (2.0, 1.0, 0.0),
+    (0.0, 2.0, 0.0), (1.0, 2.0, 0.0), (2.0, 2.0, 0.0),
+    (0.0, 0.0, 1.0), (2.0, 0.0, 1.0), (0.0, 2.0, 1.0), (2.0, 2.0, 1.0)
+]
+
+transition_vertex2sample = [0, 1, 2, 3, 4, 5, 6, 7, 8, 0, 2, 6, 8]
+
+transition_edge2vertex = [
+    (0, 1), (1, 2), (3, 4), (4, 5), (6, 7), (7, 8),
+    (0, 3), (3, 6), (1, 4), (4, 7), (2, 5), (5, 8),
+    (9, 10), (10, 12), (11, 12), (9, 11)
+]
+
+transition_facets = [
+    (0, 1, 4, 3),
+    (1, 2, 5, 4),
+    (3, 4, 7, 6),
+    (4, 5, 8, 7),
+    (9, 10, 12, 11),
+    (0, 1, 2, 10, 9),
+    (2, 5, 8, 12, 10),
+    (8, 7, 6, 11, 12),
+    (6, 3, 0, 9, 11)
+]
+
+def transition_vertex_is_set(value, vindex):
+    return has_bit(value, transition_vertex2sample[vindex])
+
+def transition_edge_index(vindex0, vindex1):
+    for eindex in range(len(transition_edge2vertex)):
+        if set(transition_edge2vertex[eindex]) == set([vindex0, vindex1]):
+            return eindex
+    return None
+
+def transition_edge_is_cut(value, eindex):
+    vindex0, vindex1 = transition_edge2vertex[eindex]
+    return bool(transition_vertex_is_set(value, vindex0)) != bool(transition_vertex_is_set(value, vindex1))
+
+def transition_midpoint_from_edge_index(eindex):
+    vindex0, vindex1 = transition_edge2vertex[eindex]
+    v1 = transition_vertices[vindex0]
+    v2 = transition_vertices[vindex1]
+    return ((v1[0] + v2[0]) / 2.0, (v1[1] + v2[1]) / 2.0, (v1[2] + v2[2]) / 2.0)
+
+'''
+    过渡单元的子面/低分辨率面 -> 与之重合的普通单元格的立方体面:
+    面内坐标小的一端对应立方体的 -1, z=0 的子面对应 z=-1 面, 低分辨率面对应 z=+1 面;
+    返回 (立方体配置, 立方体面编号), 配置中只有该面上的4个角点有意义
+'''
+def transition_facet_cube_face(value, findex):
+    facet = transition_facets[findex]
+    points = [transition_vertices[vindex] for vindex in facet]
+    cube_value = 0
+    cube_vindices = []
+    for vindex, point in zip(facet, points):
+        coord = []
+        for k in range(3):
+            low = min([p[k] for p in points])
+            high = max([p[k] for p in points])
+            if low != high:
+                coord.append(-1.0 if point[k] == low else 1.0)
             else:
-                print("generate_triangle_tables!case 3X fatal error, cut_count={cut_count}".format(cut_count=cut_count))
-        elif 7 == total_indices: # case 7
-            if 3 == cut_count:
-                total_count_case7 += 1
-                triangle_tables.append(gen_modified_mc_lut_case7(indices))
+                coord.append(-1.0 if point[k] == 0.0 else 1.0)
+        cube_vindex = vertices.index(tuple(coord))
+        cube_vindices.append(cube_vindex)
+        if transition_vertex_is_set(value, vindex):
+            cube_value |= 1 << cube_vindex
+    for cube_findex in range(len(facets)):
+        if set(facets[cube_findex]) == set(cube_vindices):
+            return cube_value, cube_findex
+    raise ValueError("transition_facet_cube_face: facet {findex} is not a cube face".format(findex=findex))
+
+def transition_facet_segments(value, findex, ambiguity_rule=ambiguity_connect_inside):
+    facet = transition_facets[findex]
+    eindices = []
+    for i in range(len(facet)):
+        eindex = transition_edge_index(facet[i], facet[(i + 1) % len(facet)])
+        if eindex != None and transition_edge_is_cut(value, eindex):
+            eindices.append(eindex)
+    if len(eindices) == 2:
+        return [(eindices[0], eindices[1])]
+    if len(eindices) == 4:
+        connect_inside = ambiguity_rule(*transition_facet_cube_face(value, findex))
+        segments = []
+        for i in range(len(facet)):
+            vindex = facet[i]
+            if bool(transition_vertex_is_set(value, vindex)) != connect_inside:
+                segments.append((transition_edge_index(facet[i - 1], vindex), transition_edge_index(vindex, facet[(i + 1) % len(facet)])))
+        return segments
+    if len(eindices) != 0:
+        print("transition_facet_segments!fatal error, value={value}, facet={findex}, eindices={eindices}".format(value=value, findex=findex, eindices=eindices))
+    return []
+
+def is_same_transition_facet_from_edge_index_2(eindex1, eindex2):
+    vindices = set(transition_edge2vertex[eindex1]) | set(transition_edge2vertex[eindex2])
+    for facet in transition_facets:
+        if vindices <= set(facet):
+            return True
+    return False
+
+def transition_facet_normal(findex):
+    # 面的外法线: 面的平面法线, 方向背离单元格中心
+    facet = transition_facets[findex]
+    P0 = transition_vertices[facet[0]]
+    N = (0.0, 0.0, 0.0)
+    for i in range(1, len(facet) - 1):
+        C = cross(subtract(transition_vertices[facet[i]], P0), subtract(transition_vertices[facet[i + 1]], P0))
+        N = (N[0] + C[0], N[1] + C[1], N[2] + C[2])
+    center = (1.0, 1.0, 0.5)
+    if dot(N, subtract(P0, center)) < 0:
+        N = (-N[0], -N[1], -N[2])
+    return normalized(N)
+
+'''
+    过渡单元的环可能很扭曲(厚度只有一层), 不用整体面积判断方向, 而是逐段判断:
+    面 f 上从切点 a 走到 b, 法线从置位指向未置位时, cross(b - a, n_f) 指向该面上的置位一侧,
+    即与 a, b 所在边上"未置位端点 -> 置位端点"的方向同向.
+'''
+def transition_loop_orient(value, loop, segment_facets):
+    score = 0.0
+    for i in range(len(loop)):
+        eindex0 = loop[i]
+        eindex1 = loop[(i + 1) % len(loop)]
+        findex = segment_facets[(min(eindex0, eindex1), max(eindex0, eindex1))]
+        P0 = transition_midpoint_from_edge_index(eindex0)
+        P1 = transition_midpoint_from_edge_index(eindex1)
+        side = cross(subtract(P1, P0), transition_facet_normal(findex))
+        for eindex in (eindex0, eindex1):
+            vindex0, vindex1 = transition_edge2vertex[eindex]
+            if transition_vertex_is_set(value, vindex0):
+                D = subtract(transition_vertices[vindex0], transition_vertices[vindex1])
             else:
-                print("generate_triangle_tables!case 7X fatal error, cut_count={cut_count}".format(cut_count=cut_count))
+                D = subtract(transition_vertices[vindex1], transition_vertices[vindex0])
+            score += dot(side, D)
+    if score < 0:
+        return list(reversed(loop))
+    return loop
+
+def trace_transition_loops(value, ambiguity_rule=ambiguity_connect_inside):
+    neighbors = {}
+    for eindex in range(len(transition_edge2vertex)):
+        if transition_edge_is_cut(value, eindex):
+            neighbors[eindex] = []
+    segment_facets = {}
+    for findex in range(len(transition_facets)):
+        for eindex0, eindex1 in transition_facet_segments(value, findex, ambiguity_rule):
+            neighbors[eindex0].append(eindex1)
+            neighbors[eindex1].append(eindex0)
+            segment_facets[(min(eindex0, eindex1), max(eindex0, eindex1))] = findex
+
+    loops = []
+    visited = []
+    for start in sorted(neighbors.keys()):
+        if start in visited:
+            continue
+        if len(neighbors[start]) != 2:
+            print("trace_transition_loops!fatal error, value={value}, edge {eindex} neighbors={neighbors}".format(value=value, eindex=start, neighbors=neighbors[start]))
+            return []
+        loop = [start]
+        visited.append(start)
+        prev_eindex = start
+        eindex = neighbors[start][0]
+        while eindex != start:
+            loop.append(eindex)
+            visited.append(eindex)
+            next_eindex = neighbors[eindex][0] if neighbors[eindex][0] != prev_eindex else neighbors[eindex][1]
+            prev_eindex = eindex
+            eindex = next_eindex
+        loops.append(transition_loop_orient(value, loop, segment_facets))
+    return loops
+
+def triangulate_transition_loop(loop):
+    loop = list(loop)
+    source = list(loop)
+    triangles = []
+    while len(loop) > 3:
+        min_dist = None
+        min_index = None
+        for i in range(len(loop)):
+            eindex0 = loop[i - 1]
+            eindex1 = loop[(i + 1) % len(loop)]
+            dist = length(subtract(transition_midpoint_from_edge_index(eindex0), transition_midpoint_from_edge_index(eindex1)))
+            if is_same_transition_facet_from_edge_index_2(eindex0, eindex1):
+                dist += 100.0
+            if min_dist == None or dist < min_dist - 1e-9:
+                min_dist = dist
+                min_index = i
+        if min_dist >= 100.0:
+            # 贪心切耳走进了死角(长环, 歧义面一连一断时出现), 改用全局最优三角化
+            return triangulate_loop_min_weight(source, transition_midpoint_from_edge_index, is_same_transition_facet_from_edge_index_2)
+        triangles.extend([loop[min_index - 1], loop[min_index], loop[(min_index + 1) % len(loop)]])
+        loop.pop(min_index)
+    triangles.extend(loop)
+    return triangles
+
+'''
+    生成 512 项过渡单元三角形表, 每行以 -1 填充到 3 * 最大三角形数 + 1 项.
+    三角形法线从置位采样点指向未置位采样点(同 triangle_tables); 模型坐标 z 轴从高分辨率面指向低分辨率面,
+    使用方映射到世界坐标时若映射行列式为负需要翻转绕向.
+'''
+def generate_transition_tables(ambiguity_rule=ambiguity_connect_inside):
+    rows = []
+    for value in range(512):
+        triangles = []
+        for loop in trace_transition_loops(value, ambiguity_rule):
+            triangles.extend(triangulate_transition_loop(loop))
+        rows.append(triangles)
+    width = max([len(row) for row in rows]) + 1
+    return [row + [-1 for i in range(width - len(row))] for row in rows]
+
+'''
+    三角形带: 每个配置的三角形按共享边连成一条或多条带, 带之间用 strip_restart_index 分隔, -1 填充.
+    带中第 k 个三角形为 (s[k], s[k+1], s[k+2]), k 为奇数时交换前两个顶点, 绕向与三角形表一致.
+    每个配置的三角形很少, 对每个起始三角形和起始边穷举贪心延伸, 每次取最长的一条带, 其余三角形继续成带.
+'''
+strip_restart_index = -2
+
+def strip_extend(strip, remaining):
+    while True:
+        if (len(strip) - 2) % 2 == 0:
+            a, b = strip[-2], strip[-1]
         else:
-            total_count_case0 += 1
-            triangle_tables.append(gen_modified_mc_lut_case0(indices))
-    
-    print("total_case0: %d"%total_count_case0)
-    print("total_case1: %d"%total_count_case1)
-    print("total_case2A: %d"%total_count_case2A)
-    print("total_case2B: %d"%total_count_case2B)
-    print("total_case2C: %d"%total_count_case2C)
-    print("total_case3A: %d"%total_count_case3A)
-    print("total_case3B: %d"%total_count_case3B)
-    print("total_case3C: %d"%total_count_case3C)
-    print("total_case4A: %d"%total_count_case4A)
-    print("total_case4B: %d"%total_count_case4B)
-    print("total_case4C: %d"%total_count_case4C)
-    print("total_case4D: %d"%total_count_case4D)
-    print("total_case4E: %d"%total_count_case4E)
-    print("total_case4F: %d"%total_count_case4F)
-    print("total_case5A: %d"%total_count_case5A)
-    print("total_case5B: %d"%total_count_case5B)
-    print("total_case5C: %d"%total_count_case5C)
-    print("total_case6A: %d"%total_count_case6A)
-    print("total_case6B: %d"%total_count_case6B)
-    print("total_case6C: %d"%total_count_case6C)
-    print("total_case7: %d"%total_count_case7)
-    return triangle_tables
+            a, b = strip[-1], strip[-2]
+        found = None
+        for triangle in remaining:
+            for r in range(3):
+                if triangle[r] == a and triangle[(r + 1) % 3] == b:
+                    found = (triangle, triangle[(r + 2) % 3])
+        if found is None:
+            return strip, remaining
+        strip = strip + [found[1]]
+        remaining = [triangle for triangle in remaining if triangle is not found[0]]
+
+def gen_triangle_strips(triangles):
+    remaining = [tuple(triangles[i:i + 3]) for i in range(0, len(triangles), 3) if triangles[i] >= 0]
+    strips = []
+    while remaining:
+        best = None
+        for triangle in remaining:
+            for r in range(3):
+                start = [triangle[r], triangle[(r + 1) % 3], triangle[(r + 2) % 3]]
+                strip, rest = strip_extend(start, [other for other in remaining if other is not triangle])
+                if best is None or len(strip) > len(best[0]):
+                    best = (strip, rest)
+        strips.append(best[0])
+        remaining = best[1]
+    return strips
+
+def strips_to_triangles(strips):
+    triangles = []
+    for strip in strips:
+        for k in range(len(strip) - 2):
+            if k % 2 == 0:
+                triangles.extend([strip[k], strip[k + 1], strip[k + 2]])
+            else:
+                triangles.extend([strip[k + 1], strip[k], strip[k + 2]])
+    return triangles
+
+def generate_strip_tables(triangle_tables):
+    rows = []
+    for i in range(256):
+        row = []
+        for strip in gen_triangle_strips(triangle_tables[i]):
+            if row:
+                row.append(strip_restart_index)
+            row.extend(strip)
+        rows.append(row)
+    width = max([len(row) for row in rows]) + 1
+    return [row + [-1 for i in range(width - len(row))] for row in rows]
+
+'''
+    内容与已有文件相同(按 sha256 比较)时不重写, 保持文件时间戳不变, 避免下游构建重复编译.
+    返回是否写入了文件.
+'''
+def save_if_changed(path, content):
+    if os.path.exists(path):
+        with open(path, mode="rb") as fp:
+            if hashlib.sha256(fp.read()).digest() == hashlib.sha256(content).digest():
+                return False
+    with open(path, mode="wb") as fp:
+        fp.write(content)
+    return True
+
+'''
+    约定: "less" 为 value < isovalue 的角点置位(与 SebLague 一致, 默认),
+    "greater" 为 value > isovalue 的角点置位. 两种约定下同一标量场得到同一张曲面,
+    greater 的第 i 行即 less 的第 255 - i 行, 被切割的边不变.
+'''
+lut_conventions = ["less", "greater"]
+
+def convert_tables_convention(edge_tables, triangle_tables, convention):
+    if convention == "less":
+        return edge_tables, triangle_tables
+    return [edge_tables[255 - i] for i in range(256)], [triangle_tables[255 - i] for i in range(256)]
 
 def modified_mc_lut_save_to_cxx(path, edge_tables, triangle_tables):
     macros_defines_start_templ = '''
@@ -1215,11 +1933,10 @@ int triTable[256][16] = {value_list}
         triangle_value_list += "},\n"
     triangle_value_list += "};"
 
-    with open(path, mode="w+") as fp:
-        fp.write(macros_defines_start_templ)
-        fp.write(edge_table_formatted_templ.format(value_list=edge_value_list))
-        fp.write(triangle_table_formatted_templ.format(value_list=triangle_value_list))
-        fp.write(macros_defines_ending_templ)
+    return save_if_changed(path, (macros_defines_start_templ
+        + edge_table_formatted_templ.format(value_list=edge_value_list)
+        + triangle_table_formatted_templ.format(value_list=triangle_value_list)
+        + macros_defines_ending_templ).encode("utf-8"))
 
 def modified_mc_lut_save_to_csharp(path, edge_tables, triangle_tables):
     edge_table_formatted_templ = '''
@@ -1243,15 +1960,162 @@ static const int triangulation[256][16] = {value_list}
         triangle_value_list += "},\n"
     triangle_value_list += "};"
 
-    with open(path, mode="w+") as fp:
-        fp.write(edge_table_formatted_templ.format(value_list=edge_value_list))
-        fp.write(triangle_table_formatted_templ.format(value_list=triangle_value_list))
+    return save_if_changed(path, (edge_table_formatted_templ.format(value_list=edge_value_list)
+        + triangle_table_formatted_templ.format(value_list=triangle_value_list)).encode("utf-8"))
 
-if __name__ == "__main__":
+'''
+    扩展表输出: ambiguousFaces[配置] 为歧义面编号(-1 填充), extTriTable[配置 * 64 + 歧义面位],
+    表项 12 为单元格中心顶点
+'''
+def modified_mc_lut_save_extended_to_cxx(path, ambiguous_faces, extended_tables):
+    macros_defines_start_templ = '''
+#ifndef __MARCHING_CUBES_EXTENDED_LUT__
+#define __MARCHING_CUBES_EXTENDED_LUT__
+    '''
+    macros_defines_ending_templ = '''
+#endif // __MARCHING_CUBES_EXTENDED_LUT__
+    '''
+    ambiguous_faces_formatted_templ = '''
+int ambiguousFaces[256][6] = {value_list}
+    '''
+    extended_table_formatted_templ = '''
+int extTriTable[256 * 64][{width}] = {value_list}
+    '''
+
+    face_value_list = "{\n"
+    for i in range(256):
+        faces = ambiguous_faces[i] + [-1 for j in range(6 - len(ambiguous_faces[i]))]
+        face_value_list += "{"
+        face_value_list += ", ".join([str(faces[j]) for j in range(6)])
+        face_value_list += "},\n"
+    face_value_list += "};"
+
+    width = len(extended_tables[0])
+    extended_value_list = "{\n"
+    for i in range(len(extended_tables)):
+        extended_value_list += "{"
+        extended_value_list += ", ".join([str(extended_tables[i][j]) for j in range(width)])
+        extended_value_list += "},\n"
+    extended_value_list += "};"
+
+    return save_if_changed(path, (macros_defines_start_templ
+        + ambiguous_faces_formatted_templ.format(value_list=face_value_list)
+        + extended_table_formatted_templ.format(width=width, value_list=extended_value_list)
+        + macros_defines_ending_templ).encode("utf-8"))
+
+'''
+    二进制格式: 256 个 uint16 边表, 随后 256*16 个 int8 三角形表, 小端
+'''
+def modified_mc_lut_save_to_bin(path, edge_tables, triangle_tables):
+    content = struct.pack("<256H", *edge_tables)
+    for i in range(256):
+        content += struct.pack("<16b", *triangle_tables[i])
+    return save_if_changed(path, content)
+
+def modified_mc_lut_load_from_bin(path):
+    with open(path, "rb") as fp:
+        content = fp.read()
+    if len(content) != 256 * 2 + 256 * 16:
+        raise ValueError("modified_mc_lut_load_from_bin: {path} has {size} bytes, expected {expected}".format(path=path, size=len(content), expected=256 * 2 + 256 * 16))
+    edge_tables = list(struct.unpack_from("<256H", content))
+    triangle_tables = [list(struct.unpack_from("<16b", content, 512 + i * 16)) for i in range(256)]
+    return edge_tables, triangle_tables
+
+def load_case_weights(path):
+    # JSON 列表, 256 个按配置索引的权重, 例如 mc_extractor 统计的 case_histogram
+    with open(path) as fp:
+        weights = json.load(fp)
+    if not isinstance(weights, list) or len(weights) != 256:
+        raise ValueError("load_case_weights: {path} must hold a JSON list of 256 weights".format(path=path))
+    return weights
+
+def modified_mc_lut_save_to_python(path, edge_tables, triangle_tables):
+    lines = ["# -*- coding: UTF-8 -*-", "edge_tables = ["]
+    for i in range(32):
+        lines.append("    " + ", ".join([hex(edge_tables[i*8+j]) for j in range(8)]) + ",")
+    lines.append("]")
+    lines.append("")
+    lines.append("triangle_tables = [")
+    for i in range(256):
+        lines.append("    [" + ", ".join([str(triangle_tables[i][j]) for j in range(16)]) + "],")
+    lines.append("]")
+    lines.append("")
+    return save_if_changed(path, "\n".join(lines).encode("utf-8"))
+
+'''
+    三角形带表输出: stripTable[256][宽度], STRIP_RESTART 分隔同一配置内的多条带, -1 结束
+'''
+def modified_mc_lut_save_strips_to_cxx(path, edge_tables, triangle_tables):
+    macros_defines_start_templ = '''
+#ifndef __MARCHING_CUBES_STRIP_LUT__
+#define __MARCHING_CUBES_STRIP_LUT__
+#define STRIP_RESTART ({restart})
+    '''
+    macros_defines_ending_templ = '''
+#endif // __MARCHING_CUBES_STRIP_LUT__
+    '''
+    strip_table_formatted_templ = '''
+int stripTable[256][{width}] = {value_list}
+    '''
+
+    strip_tables = generate_strip_tables(triangle_tables)
+    width = len(strip_tables[0])
+    strip_value_list = "{\n"
+    for i in range(256):
+        strip_value_list += "{"
+        strip_value_list += ", ".join([str(strip_tables[i][j]) for j in range(width)])
+        strip_value_list += "},\n"
+    strip_value_list += "};"
+
+    return save_if_changed(path, (macros_defines_start_templ.format(restart=strip_restart_index)
+        + strip_table_formatted_templ.format(width=width, value_list=strip_value_list)
+        + macros_defines_ending_templ).encode("utf-8"))
+
+lut_formats = {
+    "cxx": ("mc_lut.h", modified_mc_lut_save_to_cxx),
+    "csharp": ("mc_lut.cs", modified_mc_lut_save_to_csharp),
+    "bin": ("mc_lut.bin", modified_mc_lut_save_to_bin),
+    "py": ("mc_lut.py", modified_mc_lut_save_to_python),
+    "cxx_strips": ("mc_lut_strips.h", modified_mc_lut_save_strips_to_cxx),
+}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="generate the modified marching cubes lookup tables")
+    parser.add_argument("--format", default="csharp", help="comma separated list of " + ",".join(sorted(lut_formats)))
+    parser.add_argument("--out", default=".", help="output directory")
+    parser.add_argument("--convention", default="less", choices=lut_conventions, help="corner is set when value is less/greater than the isovalue")
+    parser.add_argument("--verbose", action="store_true", help="print the per-case triangle statistics")
+    parser.add_argument("--optimize", action="store_true", help="write the table chosen by optimize_triangle_tables instead of the default one")
+    parser.add_argument("--weights", default=None, help="JSON list of 256 per-case weights for --optimize, default 1 for every case")
+    parser.add_argument("--report", default=None, help="write the --optimize per-case report to this JSON file")
+    args = parser.parse_args(argv)
+
+    formats = [name.strip() for name in args.format.split(",") if name.strip()]
+    for name in formats:
+        if name not in lut_formats:
+            parser.error("unknown format {name}, expected one of {formats}".format(name=name, formats=",".join(sorted(lut_formats))))
+    if (args.weights or args.report) and not args.optimize:
+        parser.error("--weights and --report require --optimize")
+    if not os.path.isdir(args.out):
+        os.makedirs(args.out)
     edge_tables = generate_edge_tables()
-    print(edge_tables)
-    triangle_tables = generate_triangle_tables()
-    print(len(triangle_tables))
-    #for i in range(len(triangle_tables)):
-        #print("{item}\n".format(item=triangle_tables[i]))
-    modified_mc_lut_save_to_csharp("./mc_lut.cs", edge_tables, triangle_tables)
\ No newline at end of file
+    if args.optimize:
+        try:
+            weights = load_case_weights(args.weights) if args.weights else None
+        except ValueError as error:
+            parser.error(str(error))
+        triangle_tables, report = optimize_triangle_tables(weights)
+        if args.report:
+            with open(args.report, "w") as fp:
+                json.dump(report, fp, indent=2)
+            print("written {path}".format(path=args.report))
+    else:
+        triangle_tables = generate_triangle_tables(verbose=args.verbose)
+    edge_tables, triangle_tables = convert_tables_convention(edge_tables, triangle_tables, args.convention)
+    for name in formats:
+        filename, save = lut_formats[name]
+        path = os.path.join(args.out, filename)
+        print("{state} {path}".format(state="written" if save(path, edge_tables, triangle_tables) else "unchanged", path=path))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+import argparse
+import os
+import time
+import tracemalloc
+
+import numpy as np
+
+import mc_extractor
+
+'''
+    自动调优: 在真实体数据的中心样本子块上用生成的查找表做短时标定提取,
+    枚举 brick_size x backend x workers, 估计每种配置处理整个体数据时的峰值内存,
+    超出 memory_budget 的配置跳过, 吞吐量最高的配置写入 mc_extractor 默认读取的配置文件.
+    峰值内存估计 = 输入体数据 + 分块布局 + 在途块组的中间数组(进程后端另加一份传给子进程的块副本)
+        + 按单元格数放大的输出网格(各组结果保留到最后拼接, 与拼接后的数组同时存在, 按两份计).
+'''
+
+byte_units = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+def parse_bytes(text):
+    text = str(text).strip().upper().rstrip("B")
+    unit = text[-1:] if text[-1:] in byte_units else ""
+    try:
+        return int(float(text[:len(text) - len(unit)]) * byte_units[unit])
+    except ValueError:
+        raise ValueError("parse_bytes: cannot parse memory size {text}".format(text=text))
+
+def sample_volume(volume, sample_size):
+    starts = [max((n - sample_size) // 2, 0) for n in volume.shape]
+    return np.array(volume[tuple(slice(s, s + sample_size) for s in starts)])
+
+def cell_count(shape):
+    return (shape[0] - 1) * (shape[1] - 1) * (shape[2] - 1)
+
+def layout_bytes(shape, itemsize, brick_size):
+    counts = [(n - 2) // brick_size + 1 for n in shape]
+    return int(np.prod(counts)) * (brick_size + 1) ** 3 * itemsize
+
+def group_size_for(brick_size, group_cells=1 << 16):
+    # 每组约 group_cells 个单元格, 中间数组的大小与块大小无关
+    return max(group_cells // brick_size ** 3, 1)
+
+def group_peak_bytes(bricked, isovalue, group_size, groups=4):
+    # 测量前几个块组单独提取时的峰值分配
+    active = np.flatnonzero(mc_extractor.below_isovalue(bricked["mins"], isovalue) & ~mc_extractor.below_isovalue(bricked["maxs"], isovalue))
+    peak = 0
+    for start in range(0, min(len(active), groups * group_size), group_size):
+        group = active[start:start + group_size]
+        tracemalloc.start()
+        try:
+            mc_extractor.extract_brick_group(bricked["bricks"][group], bricked["origins"][group], bricked["shape"], isovalue)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+    return peak
+
+def estimate_memory(shape, itemsize, config, group_peak, mesh_bytes_per_cell):
+    in_flight = 1 if config["backend"] == "serial" else 2 * config["workers"]
+    group_bytes = group_peak
+    if config["backend"] == "process":
+        group_bytes += config["group_size"] * (config["brick_size"] + 1) ** 3 * itemsize
+    size = shape[0] * shape[1] * shape[2]
+    return (size * itemsize + layout_bytes(shape, itemsize, config["brick_size"]) + in_flight * group_bytes
+        + 2 * int(mesh_bytes_per_cell * cell_count(shape)))
+
+def calibrate(bricked, isovalue, config, repeat):
+    executor = mc_extractor.new_executor(config["backend"], config["workers"])
+    try:
+        # 第一次运行预热执行器(进程后端在子进程中建表)
+        mc_extractor.extract_bricks(bricked, isovalue, config["group_size"], workers=config["workers"], executor=executor)
+        best = None
+        for i in range(repeat):
+            start = time.perf_counter()
+            mc_extractor.extract_bricks(bricked, isovalue, config["group_size"], workers=config["workers"], executor=executor)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+def default_worker_counts():
+    counts = [1]
+    while counts[-1] * 2 <= (os.cpu_count() or 1):
+        counts.append(counts[-1] * 2)
+    if counts[-1] != (os.cpu_count() or 1):
+        counts.append(os.cpu_count())
+    return counts
+
+'''
+    返回 (profile, results), results 为每种配置的 {"config", "mcells_per_second", "memory_bytes", "fits"}.
+    没有配置满足 memory_budget 时抛出 ValueError.
+'''
+def autotune(volume, isovalue=0.0, memory_budget=None, sample_size=96, brick_sizes=(8, 16, 32),
+        backends=("serial", "thread", "process"), worker_counts=None, repeat=2, verbose=False):
+    volume = np.asarray(volume)
+    if volume.ndim != 3 or min(volume.shape) < 2:
+        raise ValueError("autotune: volume must be 3D with at least 2 samples per axis, got shape {shape}".format(shape=volume.shape))
+    worker_counts = worker_counts or default_worker_counts()
+    sample = sample_volume(volume, sample_size)
+    mc_extractor.load_tables()
+    vertices, faces = mc_extractor.extract_surface(sample, isovalue)
+    mesh_bytes_per_cell = (vertices.nbytes + faces.nbytes) / cell_count(sample.shape)
+    results = []
+    for brick_size in brick_sizes:
+        bricked = mc_extractor.brick_volume(sample, brick_size)
+        group_size = group_size_for(brick_size)
+        group_peak = group_peak_bytes(bricked, isovalue, group_size)
+        for backend in backends:
+            for workers in ([1] if backend == "serial" else worker_counts):
+                config = {"brick_size": brick_size, "group_size": group_size, "backend": backend, "workers": workers}
+                memory_bytes = estimate_memory(volume.shape, volume.dtype.itemsize, config, group_peak, mesh_bytes_per_cell)
+                fits = memory_budget is None or memory_bytes <= memory_budget
+                rate = cell_count(sample.shape) / calibrate(bricked, isovalue, config, repeat) / 1e6 if fits else 0.0
+                results.append({"config": config, "mcells_per_second": rate, "memory_bytes": memory_bytes, "fits": fits})
+                if verbose:
+                    print("  brick {brick_size:>3} {backend:>8} x{workers:<3} {rate:10.2f} Mcells/s {memory:10.1f} MiB{skip}".format(
+                        rate=rate, memory=memory_bytes / float(1 << 20), skip="" if fits else "  (over budget)", **config))
+    candidates = [r for r in results if r["fits"]]
+    if not candidates:
+        raise ValueError("autotune: no configuration fits the memory budget of {budget} bytes".format(budget=memory_budget))
+    best = max(candidates, key=lambda r: r["mcells_per_second"])
+    profile = dict(best["config"])
+    profile["mcells_per_second"] = round(best["mcells_per_second"], 3)
+    profile["memory_bytes"] = best["memory_bytes"]
+    profile["calibrated_shape"] = list(volume.shape)
+    return profile, results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="calibrate brick size, backend and worker count for mc_extractor.extract_bricks")
+    parser.add_argument("volume", help="volume stored as .npy (memory mapped, only the sample is read for calibration)")
+    parser.add_argument("--isovalue", type=float, default=0.0)
+    parser.add_argument("--memory-budget", default=None, help="peak RAM allowed for extracting the whole volume, e.g. 512M, 8G")
+    parser.add_argument("--sample-size", type=int, default=96, help="edge length of the central calibration sample")
+    parser.add_argument("--brick-sizes", default="8,16,32")
+    parser.add_argument("--backends", default=",".join(mc_extractor.profile_backends))
+    parser.add_argument("--workers", default=None, help="comma separated worker counts, default powers of two up to the cpu count")
+    parser.add_argument("--profile", default=None, help="output profile path, default $MC_EXTRACTOR_PROFILE or ./mc_profile.json")
+    args = parser.parse_args(argv)
+
+    backends = [name.strip() for name in args.backends.split(",") if name.strip()]
+    for name in backends:
+        if name not in mc_extractor.profile_backends:
+            parser.error("unknown backend {name}, expected one of {backends}".format(name=name, backends=",".join(mc_extractor.profile_backends)))
+    volume = np.load(args.volume, mmap_mode="r")
+    try:
+        profile, results = autotune(volume, args.isovalue,
+            memory_budget=parse_bytes(args.memory_budget) if args.memory_budget else None,
+            sample_size=args.sample_size,
+            brick_sizes=[int(size) for size in args.brick_sizes.split(",")],
+            backends=backends,
+            worker_counts=[int(count) for count in args.workers.split(",")] if args.workers else None,
+            verbose=True)
+    except ValueError as error:
+        parser.error(str(error))
+    path = mc_extractor.save_profile(profile, args.profile)
+    print("brick {brick_size}, {backend} x{workers}: {mcells_per_second} Mcells/s -> {path}".format(path=path, **profile))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+import sys
+import time
+
+import numpy as np
+
+import mc_compare
+import mc_extractor
+
+'''
+    行主序整体提取(extract_surface)与 Morton 序分块提取(brick_volume + extract_bricks)的吞吐量对比.
+    分块布局只建一次, 在多个 isovalue 上复用, 建块耗时单独报告; 吞吐量按体数据的单元格数计算.
+    两条路径用同样的焊接方式比较: 计时期间放开 dense_weld_limit, extract_surface 总是用稠密映射表焊接,
+    不会因为体数据超过阈值退回 np.unique 排序而显得更慢(extract_bricks 不做全局焊接).
+    batch 模式: 同一批小块逐块调用 extract_surface 与一次 extract_batch 的吞吐量对比.
+'''
+
+def best_time(run, repeat):
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def benchmark_bricks(volume, isovalues, brick_size=16, group_size=16, repeat=3):
+    volume = np.asarray(volume)
+    cells = (volume.shape[0] - 1) * (volume.shape[1] - 1) * (volume.shape[2] - 1)
+    mc_extractor.load_tables()
+    start = time.perf_counter()
+    bricked = mc_extractor.brick_volume(volume, brick_size)
+    results = {"build_seconds": time.perf_counter() - start, "row_major": [], "bricks": []}
+    dense_weld_limit = mc_extractor.dense_weld_limit
+    mc_extractor.dense_weld_limit = max(dense_weld_limit, 3 * volume.size)
+    try:
+        for isovalue in isovalues:
+            elapsed = best_time(lambda: mc_extractor.extract_surface(volume, isovalue), repeat)
+            results["row_major"].append(cells / elapsed / 1e6)
+            # 固定串行单线程, 与 extract_surface 对比时不受调优配置(mc_profile.json)影响
+            elapsed = best_time(lambda: mc_extractor.extract_bricks(bricked, isovalue, group_size, backend="serial", workers=1), repeat)
+            results["bricks"].append(cells / elapsed / 1e6)
+    finally:
+        mc_extractor.dense_weld_limit = dense_weld_limit
+    return results
+
+def print_benchmark(name, isovalues, results):
+    print("{name} (brick build {seconds:.3f}s)".format(name=name, seconds=results["build_seconds"]))
+    print("  {key:>10} {row:>14} {bricks:>14} {speedup:>8}".format(key="isovalue", row="row-major", bricks="morton bricks", speedup="speedup"))
+    for i in range(len(isovalues)):
+        row, bricks = results["row_major"][i], results["bricks"][i]
+        print("  {key:10.3f} {row:14.2f} {bricks:14.2f} {speedup:8.2f}".format(key=isovalues[i], row=row, bricks=bricks, speedup=bricks / row))
+
+def split_chunks(volume, chunk_size):
+    # 相邻小块共享一层边界样本
+    counts = [(n - 1) // chunk_size for n in volume.shape]
+    return np.stack([volume[i * chunk_size:(i + 1) * chunk_size + 1, j * chunk_size:(j + 1) * chunk_size + 1, k * chunk_size:(k + 1) * chunk_size + 1]
+        for i in range(counts[0]) for j in range(counts[1]) for k in range(counts[2])])
+
+def benchmark_batch(chunks, isovalue=0.0, repeat=3):
+    cells = chunks.shape[0] * (chunks.shape[1] - 1) * (chunks.shape[2] - 1) * (chunks.shape[3] - 1)
+    mc_extractor.extract_batch(chunks[:1], isovalue)
+    loop = best_time(lambda: [mc_extractor.extract_surface(chunk, isovalue) for chunk in chunks], repeat)
+    batch = best_time(lambda: mc_extractor.extract_batch(chunks, isovalue), repeat)
+    return {"loop": cells / loop / 1e6, "batch": cells / batch / 1e6}
+
+def print_batch_benchmark(count, chunk_size):
+    print("Mcells/s, {count} chunks of {size}^3 samples".format(count=count, size=chunk_size + 1))
+    print("  {key:>10} {loop:>14} {batch:>14} {speedup:>8}".format(key="volume", loop="loop", batch="extract_batch", speedup="speedup"))
+    side = int(round(count ** (1.0 / 3)))
+    for name, volume in mc_compare.sample_volumes(side * chunk_size + 1):
+        results = benchmark_batch(split_chunks(volume, chunk_size))
+        print("  {key:>10} {loop:14.2f} {batch:14.2f} {speedup:8.2f}".format(key=name, speedup=results["batch"] / results["loop"], **results))
+
+if __name__ == "__main__" and len(sys.argv) > 1 and sys.argv[1] == "batch":
+    print_batch_benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 125, int(sys.argv[3]) if len(sys.argv) > 3 else 32)
+elif __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 128
+    brick_size = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    isovalues = [-0.2, 0.0, 0.2]
+    print("Mcells/s, size {size}^3, brick {brick}^3, serial backend, row-major with dense weld".format(size=size, brick=brick_size))
+    for name, volume in mc_compare.sample_volumes(size):
+        print_benchmark(name, isovalues, benchmark_bricks(volume, isovalues, brick_size))
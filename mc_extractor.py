@@ -0,0 +1,1616 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+import asyncio
+import collections
+import concurrent.futures
+import json
+import math
+import os
+import time
+
+import numpy as np
+
+import gen_modified_mc_lut as lut
+import mc_mesh_order
+
+'''
+    基于 gen_modified_mc_lut 生成的 edge_tables/triangle_tables 的向量化等值面提取.
+    体数据按 volume[x, y, z] 索引, 单元格的8个角点与 lut.vertices 一致:
+    顶点坐标 (-1, 1) 映射为网格偏移 (0, 1).
+    约定: value < isovalue 的角点置位(与 SebLague 的 Marching-Cubes 一致),
+    三角面法线指向数值增大的方向.
+'''
+
+corner_offsets = np.array([[(c + 1) // 2 for c in v] for v in lut.vertices], dtype=np.int64)
+
+# 每条立方体边: 起点(较小角点)的网格偏移和所在轴
+edge_offsets = np.zeros((12, 3), dtype=np.int64)
+edge_axis = np.zeros(12, dtype=np.int64)
+for eindex in range(12):
+    v0, v1 = lut.edge2vertex[eindex]
+    p0 = corner_offsets[v0]
+    p1 = corner_offsets[v1]
+    edge_offsets[eindex] = np.minimum(p0, p1)
+    edge_axis[eindex] = int(np.argmax(np.abs(p1 - p0)))
+
+axis_units = np.eye(3, dtype=np.int64)
+
+lut_cache = {}
+
+'''
+    查找表默认由 lut.generate_triangle_tables 生成; load_tables(path) 或环境变量 MC_EXTRACTOR_LUT
+    指向 gen_modified_mc_lut.py --format bin 写出的 mc_lut.bin (例如 --optimize 选出的表, 须用默认的 --convention less)
+    时改用该文件, 换表时清空所有派生表. 进程后端的子进程只读环境变量.
+    ambiguity="decider" 的扩展表和过渡表不受影响.
+'''
+def load_tables(path=None):
+    if path is not None and lut_cache.get("source") != path:
+        lut_cache.clear()
+    if not lut_cache:
+        path = path or os.environ.get("MC_EXTRACTOR_LUT")
+        if path:
+            edge_tables, triangle_tables = lut.modified_mc_lut_load_from_bin(path)
+        else:
+            edge_tables = lut.generate_edge_tables()
+            triangle_tables = lut.generate_triangle_tables(verbose=False)
+        lut_cache["source"] = path
+        triangles = np.array(triangle_tables, dtype=np.int8)
+        lut_cache["edge"] = np.array(edge_tables, dtype=np.uint16)
+        lut_cache["triangle"] = triangles
+        lut_cache["triangle_count"] = (np.count_nonzero(triangles >= 0, axis=1) // 3).astype(np.int64)
+    return lut_cache
+
+def load_extended_tables():
+    tables = load_tables()
+    if "extended" not in tables:
+        ambiguous_faces, extended_tables = lut.generate_extended_triangle_tables()
+        extended = np.array(extended_tables, dtype=np.int8)
+        masks = np.zeros(256, dtype=np.uint8)
+        for value in range(256):
+            for findex in ambiguous_faces[value]:
+                masks[value] |= 1 << findex
+        tables["ambiguous_face_mask"] = masks
+        tables["extended"] = extended
+        tables["extended_count"] = (np.count_nonzero(extended >= 0, axis=1) // 3).astype(np.int64)
+    return tables
+
+'''
+    渐近判定(asymptotic decider): 歧义面四个角点按 facets 的环序为 f0..f3 (已减去 isovalue),
+    双线性插值鞍点值为 (f0*f2 - f1*f3) / (f0 + f2 - f1 - f3), 鞍点值 < 0 时面上的置位角点连通.
+    只对配置中含歧义面的单元格计算, 返回扩展表行号 配置 * 64 + 歧义面位.
+'''
+def face_decider_rows(volume, cell_ids, cases, isovalue):
+    tables = load_extended_tables()
+    masks = tables["ambiguous_face_mask"][cases]
+    rows = cases.astype(np.int64) * 64
+    pick = np.flatnonzero(masks)
+    if len(pick) == 0:
+        return rows
+    coords = cell_coords_from_ids(cell_ids[pick], volume.shape)
+    values = np.empty((len(pick), 8), dtype=np.float64)
+    for vindex in range(8):
+        p = coords + corner_offsets[vindex]
+        values[:, vindex] = volume[p[:, 0], p[:, 1], p[:, 2]]
+    values -= isovalue
+    face_bits = np.zeros(len(pick), dtype=np.int64)
+    for findex in range(6):
+        f0, f1, f2, f3 = [values[:, vindex] for vindex in lut.facets[findex]]
+        connected = (f0 * f2 - f1 * f3) * (f0 + f2 - f1 - f3) < 0
+        face_bits |= connected.astype(np.int64) << findex
+    rows[pick] += face_bits & masks[pick]
+    return rows
+
+def classify_cells(inside):
+    # inside: bool (..., X, Y, Z) -> 每个单元格的8位配置 (..., X-1, Y-1, Z-1)
+    nx, ny, nz = inside.shape[-3:]
+    bits = inside.view(np.uint8)
+    cases = np.zeros(inside.shape[:-3] + (nx - 1, ny - 1, nz - 1), dtype=np.uint8)
+    shifted = np.empty_like(cases)
+    for vindex in range(8):
+        ox, oy, oz = corner_offsets[vindex]
+        corner = bits[..., ox:ox + nx - 1, oy:oy + ny - 1, oz:oz + nz - 1]
+        np.left_shift(corner, vindex, out=shifted)
+        cases |= shifted
+    return cases
+
+def active_cells(cases):
+    cell_ids = np.flatnonzero((cases != 0) & (cases != 255))
+    return cell_ids, cases.reshape(-1)[cell_ids]
+
+def cell_coords_from_ids(cell_ids, shape):
+    cx, cy, cz = np.unravel_index(cell_ids, (shape[0] - 1, shape[1] - 1, shape[2] - 1))
+    return np.stack([cx, cy, cz], axis=1).astype(np.int64)
+
+'''
+    全局边编号: axis * (X*Y*Z) + 起点的线性索引, 相邻单元格共享的边编号相同
+'''
+def edge_id_deltas(shape):
+    # 立方体12条边相对于单元格原点(角点0)的全局边编号增量
+    nx, ny, nz = shape
+    return edge_axis * (nx * ny * nz) + (edge_offsets[:, 0] * ny + edge_offsets[:, 1]) * nz + edge_offsets[:, 2]
+
+def cell_origins_from_ids(cell_ids, shape):
+    # 单元格线性编号 -> 角点0在网格点上的线性编号
+    nx, ny, nz = shape
+    cx, rest = np.divmod(cell_ids, (ny - 1) * (nz - 1))
+    cy, cz = np.divmod(rest, nz - 1)
+    return (cx * ny + cy) * nz + cz
+
+def edge_endpoints(edge_ids, shape):
+    nx, ny, nz = shape
+    axis = edge_ids // (nx * ny * nz)
+    linear = edge_ids % (nx * ny * nz)
+    px, py, pz = np.unravel_index(linear, shape)
+    return np.stack([px, py, pz], axis=1).astype(np.int64), axis
+
+def emit_cell_edges(cell_ids, cases, shape, table="triangle"):
+    # 按 triangle_tables 展开, 返回每个三角形顶点所在的全局边编号 (3*F,)
+    # table="extended" 时 cases 为扩展表行号 (配置 * 64 + 歧义面位)
+    # 扩展表中的单元格中心顶点编号为 3*X*Y*Z + 单元格编号, 排在所有边之后
+    tables = load_extended_tables() if table == "extended" else load_tables()
+    entries = tables[table][cases]
+    mask = entries >= 0
+    counts = tables[table + "_count"][cases] * 3
+    cell_ids = np.asarray(cell_ids, dtype=np.int64)
+    origins = cell_origins_from_ids(cell_ids, shape)
+    entries = entries[mask]
+    if table != "extended":
+        return np.repeat(origins, counts) + edge_id_deltas(shape)[entries]
+    deltas = np.append(edge_id_deltas(shape), 0)
+    edge_ids = np.repeat(origins, counts) + deltas[entries]
+    center = entries == lut.center_vertex_index
+    edge_ids[center] = 3 * shape[0] * shape[1] * shape[2] + np.repeat(cell_ids, counts)[center]
+    return edge_ids
+
+def center_vertices(volume, cell_ids, cases, isovalue, normals=False):
+    # 单元格中心顶点: 该单元格所有被切割边上插值点(及法线)的平均, cases 为这些单元格已算好的配置
+    tables = load_tables()
+    cut = (tables["edge"][cases][:, None] >> np.arange(12)) & 1
+    centers, eindices = np.nonzero(cut)
+    edge_ids = cell_origins_from_ids(cell_ids, volume.shape)[centers] + edge_id_deltas(volume.shape)[eindices]
+    points, axis, value0, value1 = edge_values(volume, edge_ids)
+    counts = cut.sum(axis=1)[:, None]
+    positions = np.zeros((len(cell_ids), 3))
+    np.add.at(positions, centers, interpolate_points(points, axis, value0, value1, isovalue))
+    if not normals:
+        return positions / counts
+    directions = np.zeros((len(cell_ids), 3))
+    np.add.at(directions, centers, edge_normals(volume, points, axis, edge_fractions(value0, value1, isovalue)))
+    return positions / counts, normalize_rows(directions)
+
+# 全局边总数不超过该值时用稠密映射表焊接顶点(避免排序), 否则退回 np.unique
+dense_weld_limit = 1 << 24
+
+def weld_edges(edge_ids, total=None, width=3):
+    if total is not None and total <= dense_weld_limit:
+        used = np.zeros(total, dtype=bool)
+        used[edge_ids] = True
+        unique_ids = np.flatnonzero(used)
+        remap = np.empty(total, dtype=np.int64)
+        remap[unique_ids] = np.arange(len(unique_ids))
+        return unique_ids, remap[edge_ids].reshape(-1, width)
+    unique_ids, inverse = np.unique(edge_ids, return_inverse=True)
+    return unique_ids, inverse.reshape(-1, width)
+
+'''
+    整数体数据(如 uint16 CT, uint8 概率)不转换成浮点: 分类按原类型比较,
+    对整数 v, v < isovalue 等价于 v < ceil(isovalue); 只有被切割边的两个端点值转成 float32 插值.
+'''
+def below_isovalue(volume, isovalue):
+    if volume.dtype.kind not in "iu":
+        return volume < isovalue
+    info = np.iinfo(volume.dtype)
+    threshold = math.ceil(isovalue)
+    if threshold > info.max:
+        return np.ones(volume.shape, dtype=bool)
+    if threshold <= info.min:
+        return np.zeros(volume.shape, dtype=bool)
+    return volume < volume.dtype.type(threshold)
+
+def edge_fractions(value0, value1, isovalue):
+    if value0.dtype.kind in "iu":
+        value0 = value0.astype(np.float32)
+        return (np.float32(isovalue) - value0) / (value1.astype(np.float32) - value0)
+    return (isovalue - value0.astype(np.float64)) / (value1.astype(np.float64) - value0)
+
+def interpolate_points(points, axis, value0, value1, isovalue):
+    positions = points.astype(np.float64)
+    positions[np.arange(len(axis)), axis] += edge_fractions(value0, value1, isovalue)
+    return positions
+
+def edge_values(volume, unique_ids):
+    points, axis = edge_endpoints(unique_ids, volume.shape)
+    others = points + axis_units[axis]
+    value0 = volume[points[:, 0], points[:, 1], points[:, 2]]
+    value1 = volume[others[:, 0], others[:, 1], others[:, 2]]
+    return points, axis, value0, value1
+
+def interpolate_edges(volume, unique_ids, isovalue):
+    points, axis, value0, value1 = edge_values(volume, unique_ids)
+    return interpolate_points(points, axis, value0, value1, isovalue)
+
+def midpoint_edges(unique_ids, shape):
+    points, axis = edge_endpoints(unique_ids, shape)
+    positions = points.astype(np.float64)
+    positions[np.arange(len(axis)), axis] += 0.5
+    return positions
+
+'''
+    网格坐标 -> 物理坐标: spacing 为每轴体素间距 (sx, sy, sz), volume[0, 0, 0] 位于原点;
+    coordinates 为每轴的采样坐标数组(直线网格, 严格递增), 二者只能给一个.
+    顶点都落在网格边上, 逐轴分段线性映射即为精确位置, 不需要先重采样成各向同性体数据.
+'''
+def grid_axes(shape, spacing=None, coordinates=None):
+    if spacing is not None and coordinates is not None:
+        raise ValueError("grid_axes: pass either spacing or coordinates, not both")
+    if coordinates is None:
+        if spacing is None:
+            return None
+        spacing = np.broadcast_to(np.asarray(spacing, dtype=np.float64), (3,))
+        if np.any(spacing <= 0):
+            raise ValueError("grid_axes: spacing must be positive, got {spacing}".format(spacing=tuple(spacing)))
+        return [np.arange(shape[axis]) * spacing[axis] for axis in range(3)]
+    if len(coordinates) != 3:
+        raise ValueError("grid_axes: coordinates must hold one array per axis, got {count}".format(count=len(coordinates)))
+    axes = []
+    for axis in range(3):
+        values = np.asarray(coordinates[axis], dtype=np.float64)
+        if values.shape != (shape[axis],) or np.any(np.diff(values) <= 0):
+            raise ValueError("grid_axes: coordinates[{axis}] must be strictly increasing with {count} entries".format(axis=axis, count=shape[axis]))
+        axes.append(values)
+    return axes
+
+def grid_to_world(positions, axes):
+    if axes is None:
+        return positions
+    world = np.empty(positions.shape, dtype=np.result_type(positions.dtype, np.float32))
+    for axis in range(3):
+        world[:, axis] = np.interp(positions[:, axis], np.arange(len(axes[axis])), axes[axis])
+    return world
+
+def world_normals(normals, positions, axes):
+    # 索引空间的梯度除以该处每轴的局部间距 dc/di, 再归一化
+    if axes is None:
+        return normals
+    scaled = np.empty(normals.shape, dtype=np.float64)
+    for axis in range(3):
+        step = np.interp(positions[:, axis], np.arange(len(axes[axis])), np.gradient(axes[axis]))
+        scaled[:, axis] = normals[:, axis] / step
+    return normalize_rows(scaled).astype(normals.dtype, copy=False)
+
+'''
+    顶点输出格式:
+    float64/float32/float16: 网格坐标 (V, 3); float16 在坐标超过 1024 后精度降到 0.5 以下, 只适合小块预览.
+    edge8/edge16: 顶点总落在网格边上, 存为 (全局边编号, 量化插值参数) 的结构化数组,
+    用 decode_vertices 还原坐标.
+'''
+vertex_formats = {
+    "float64": np.float64,
+    "float32": np.float32,
+    "float16": np.float16,
+    "edge8": np.uint8,
+    "edge16": np.uint16,
+}
+
+def encode_edge_vertices(unique_ids, t, shape, dtype):
+    scale = np.iinfo(dtype).max
+    id_dtype = np.uint32 if 3 * shape[0] * shape[1] * shape[2] <= np.iinfo(np.uint32).max else np.uint64
+    encoded = np.empty(len(unique_ids), dtype=[("edge", id_dtype), ("t", dtype)])
+    encoded["edge"] = unique_ids
+    encoded["t"] = np.rint(np.clip(t, 0.0, 1.0) * scale)
+    return encoded
+
+def decode_vertices(encoded, shape, dtype=np.float32, spacing=None, coordinates=None):
+    points, axis = edge_endpoints(encoded["edge"].astype(np.int64), shape)
+    positions = points.astype(dtype)
+    scale = np.iinfo(encoded.dtype["t"]).max
+    positions[np.arange(len(axis)), axis] += encoded["t"].astype(dtype) / dtype(scale)
+    return grid_to_world(positions, grid_axes(shape, spacing, coordinates)).astype(dtype, copy=False)
+
+'''
+    梯度法线: 被切割边两个端点上的中心差分梯度(体边界处单侧差分), 每个网格点只计算一次,
+    按插值参数线性插值后归一化. 梯度指向数值增大的方向, 与三角面的绕向一致.
+'''
+def point_gradients(volume, point_ids):
+    coords = np.stack(np.unravel_index(point_ids, volume.shape), axis=1)
+    gradients = np.empty((len(point_ids), 3))
+    for axis in range(3):
+        lo = coords.copy()
+        hi = coords.copy()
+        lo[:, axis] = np.maximum(coords[:, axis] - 1, 0)
+        hi[:, axis] = np.minimum(coords[:, axis] + 1, volume.shape[axis] - 1)
+        delta = volume[hi[:, 0], hi[:, 1], hi[:, 2]].astype(np.float64) - volume[lo[:, 0], lo[:, 1], lo[:, 2]]
+        gradients[:, axis] = delta / (hi[:, axis] - lo[:, axis])
+    return gradients
+
+def normalize_rows(directions):
+    lengths = np.linalg.norm(directions, axis=1, keepdims=True)
+    return directions / np.where(lengths > 0, lengths, 1.0)
+
+def edge_normals(volume, points, axis, t):
+    nx, ny, nz = volume.shape
+    strides = np.array([ny * nz, nz, 1], dtype=np.int64)
+    point0 = (points[:, 0] * ny + points[:, 1]) * nz + points[:, 2]
+    point1 = point0 + strides[axis]
+    point_ids, inverse = np.unique(np.concatenate([point0, point1]), return_inverse=True)
+    gradients = point_gradients(volume, point_ids)[inverse.reshape(-1)]
+    gradient0 = gradients[:len(point0)]
+    gradient1 = gradients[len(point0):]
+    return normalize_rows(gradient0 + (gradient1 - gradient0) * t[:, None])
+
+def format_vertices(volume, unique_ids, isovalue, vertex_format, normals=False):
+    # normals=True 时返回 (vertices, normals), 法线与坐标共用同一次端点取值
+    if vertex_format not in vertex_formats:
+        raise ValueError("unknown vertex_format {vertex_format}, expected one of {formats}".format(vertex_format=vertex_format, formats=sorted(vertex_formats)))
+    dtype = vertex_formats[vertex_format]
+    points, axis, value0, value1 = edge_values(volume, unique_ids)
+    t = edge_fractions(value0, value1, isovalue)
+    if vertex_format.startswith("edge"):
+        vertices = encode_edge_vertices(unique_ids, t, volume.shape, dtype)
+    else:
+        vertices = interpolate_points(points, axis, value0, value1, isovalue).astype(dtype, copy=False)
+    if not normals:
+        return vertices
+    normal_dtype = np.float64 if vertex_format == "float64" else np.float32
+    return vertices, edge_normals(volume, points, axis, t).astype(normal_dtype, copy=False)
+
+'''
+    提取统计: stats=new_stats() 传入 extract_surface/extract_chunks 后逐次累加,
+    timings 为各阶段(classify/emit/weld/vertices)耗时(秒), bytes 为各阶段中间数组字节数之和,
+    case_histogram 为全部单元格的 256 种配置计数. stats=None(默认)时不计时也不统计.
+'''
+def new_stats():
+    return {
+        "timings": {"classify": 0.0, "emit": 0.0, "weld": 0.0, "vertices": 0.0},
+        "cells": 0,
+        "active_cells": 0,
+        "triangles": 0,
+        "bytes": 0,
+        "case_histogram": np.zeros(256, dtype=np.int64),
+    }
+
+def record_stage(stats, stage, start, *arrays):
+    # 返回当前时刻作为下一阶段的起点
+    if stats is None:
+        return None
+    now = time.perf_counter()
+    stats["timings"][stage] = stats["timings"].get(stage, 0.0) + now - start
+    for array in arrays:
+        stats["bytes"] += array.nbytes
+    return now
+
+def record_cases(stats, cases, cell_ids):
+    if stats is None:
+        return
+    stats["cells"] += cases.size
+    stats["active_cells"] += len(cell_ids)
+    stats["case_histogram"] += np.bincount(cases.reshape(-1), minlength=256)
+
+def stats_report(stats, top=10):
+    # 按该配置产生的三角形数排序, 列出占比最高的 triangle_tables 表项
+    tables = load_tables()
+    histogram = stats["case_histogram"]
+    triangles = histogram * tables["triangle_count"]
+    lines = ["cells {cells}, active {active}, triangles {triangles}, bytes {nbytes}".format(cells=stats["cells"], active=stats["active_cells"], triangles=stats["triangles"], nbytes=stats["bytes"])]
+    total_time = sum(stats["timings"].values())
+    for stage, seconds in stats["timings"].items():
+        share = seconds / total_time if total_time > 0 else 0.0
+        lines.append("  {stage:<9} {ms:10.3f} ms {share:6.1%}".format(stage=stage, ms=seconds * 1000.0, share=share))
+    total_triangles = max(int(triangles.sum()), 1)
+    for value in np.argsort(-triangles, kind="stable")[:top]:
+        if histogram[value] == 0:
+            break
+        lines.append("  case {value:3d} ({name:>2}): cells {cells}, triangles {count} ({share:.1%})".format(value=value, name=lut.classify_case(lut.indices_from_bit(int(value))), cells=histogram[value], count=triangles[value], share=triangles[value] / total_triangles))
+    return "\n".join(lines)
+
+'''
+    标量体等值面提取, 返回 (vertices, faces (F, 3)), vertices 的格式见 vertex_formats.
+    ambiguity="decider" 时用渐近判定选择歧义面的连通方式, 查扩展表生成三角形.
+    normals=True 时额外返回梯度插值得到的单位顶点法线, 返回 (vertices, faces, normals).
+    stats 见 new_stats; spacing/coordinates 见 grid_axes, 给出时顶点(和法线)为物理坐标,
+    edge 格式的顶点仍按网格边编码, 解码时把同样的 spacing/coordinates 传给 decode_vertices.
+    min_component_triangles > 0 时去掉三角形数少于该值的连通分量(浮岛).
+    components=True 时在返回值末尾追加 (face_components, component_triangles):
+    每个三角形的连通分量编号 0..C-1 和每个分量的三角形数, 按过滤后的网格重新编号.
+    reorder="morton"/"tipsify" 时按 mc_mesh_order 重排三角形(morton 直接用三角形所在单元格的坐标),
+    再按首次使用重排顶点, 法线和分量编号随之重排.
+'''
+def extract_surface(volume, isovalue=0.0, vertex_format="float64", ambiguity="table", normals=False, stats=None, spacing=None, coordinates=None, min_component_triangles=0, components=False, reorder=None):
+    volume = np.asarray(volume)
+    if volume.ndim != 3 or min(volume.shape) < 2:
+        raise ValueError("extract_surface: volume must be 3D with at least 2 samples per axis, got shape {shape}".format(shape=volume.shape))
+    if reorder is not None and reorder not in mc_mesh_order.reorder_methods:
+        raise ValueError("extract_surface: unknown reorder {reorder}, expected None or one of {methods}".format(reorder=reorder, methods=mc_mesh_order.reorder_methods))
+    axes = grid_axes(volume.shape, spacing, coordinates)
+    # 先生成查找表, 一次性的建表耗时不计入 emit 阶段
+    if ambiguity == "decider":
+        load_extended_tables()
+    else:
+        load_tables()
+    start = time.perf_counter() if stats is not None else None
+    cases = classify_cells(below_isovalue(volume, isovalue))
+    cell_ids, active_cases = active_cells(cases)
+    start = record_stage(stats, "classify", start, cases, cell_ids)
+    record_cases(stats, cases, cell_ids)
+    total = 3 * volume.size
+    if ambiguity == "decider":
+        if vertex_format.startswith("edge"):
+            raise ValueError("extract_surface: ambiguity='decider' may add cell center vertices, which {vertex_format} cannot encode".format(vertex_format=vertex_format))
+        rows = face_decider_rows(volume, cell_ids, active_cases, isovalue)
+        table = "extended"
+        edge_ids = emit_cell_edges(cell_ids, rows, volume.shape, table=table)
+        total_ids = total + (volume.shape[0] - 1) * (volume.shape[1] - 1) * (volume.shape[2] - 1)
+    elif ambiguity == "table":
+        rows = active_cases
+        table = "triangle"
+        edge_ids = emit_cell_edges(cell_ids, rows, volume.shape)
+        total_ids = total
+    else:
+        raise ValueError("extract_surface: unknown ambiguity {ambiguity}, expected 'table' or 'decider'".format(ambiguity=ambiguity))
+    start = record_stage(stats, "emit", start, edge_ids)
+    unique_ids, faces = weld_edges(edge_ids, total_ids)
+    if reorder == "morton":
+        face_cells = np.repeat(cell_ids, lut_cache[table + "_count"][rows])
+    if min_component_triangles > 0 or components:
+        face_components, component_triangles = cell_components(faces, rows, len(unique_ids), table)
+    if min_component_triangles > 0:
+        # 在插值之前按分量过滤, 被去掉的顶点不做插值
+        keep = component_triangles >= min_component_triangles
+        kept = keep[face_components]
+        faces = faces[kept]
+        if reorder == "morton":
+            face_cells = face_cells[kept]
+        face_components = (np.cumsum(keep) - 1)[face_components[kept]]
+        component_triangles = component_triangles[keep]
+        used = np.zeros(len(unique_ids), dtype=bool)
+        used[faces] = True
+        unique_ids = unique_ids[used]
+        faces = (np.cumsum(used) - 1)[faces]
+    start = record_stage(stats, "weld", start, unique_ids, faces)
+    # 中心顶点编号排在所有边之后, 只有 decider 模式会出现
+    split = np.searchsorted(unique_ids, total)
+    result = format_vertices(volume, unique_ids[:split], isovalue, vertex_format, normals)
+    vertices, vertex_normals = result if normals else (result, None)
+    if split < len(unique_ids):
+        center_cells = unique_ids[split:] - total
+        # cell_ids 由 flatnonzero 得到, 已排序
+        center_cases = active_cases[np.searchsorted(cell_ids, center_cells)]
+        centers = center_vertices(volume, center_cells, center_cases, isovalue, normals)
+        if normals:
+            centers, center_normals = centers
+            vertex_normals = np.concatenate([vertex_normals, center_normals.astype(vertex_normals.dtype)])
+        vertices = np.concatenate([vertices, centers.astype(vertices.dtype)])
+    if axes is not None and not vertex_format.startswith("edge"):
+        if normals:
+            vertex_normals = world_normals(vertex_normals, vertices, axes)
+        vertices = grid_to_world(vertices, axes).astype(vertices.dtype, copy=False)
+    start = record_stage(stats, "vertices", start, vertices, *([vertex_normals] if normals else []))
+    if reorder is not None:
+        if reorder == "morton":
+            order = mc_mesh_order.cell_triangle_order(cell_coords_from_ids(face_cells, volume.shape))
+        else:
+            order = mc_mesh_order.tipsify_triangle_order(faces, len(vertices))
+        faces = faces[order]
+        vertex_order, remap = mc_mesh_order.first_use_order(faces, len(vertices))
+        faces = remap[faces]
+        vertices = vertices[vertex_order]
+        if normals:
+            vertex_normals = vertex_normals[vertex_order]
+        if components:
+            face_components = face_components[order]
+        record_stage(stats, "reorder", start, faces)
+    if stats is not None:
+        stats["triangles"] += len(faces)
+    result = (vertices, faces, vertex_normals) if normals else (vertices, faces)
+    if components:
+        result += (face_components, component_triangles)
+    return result
+
+'''
+    多标签分割体一次遍历提取:
+    1. 8个角点标签全部相同的单元格直接跳过;
+    2. 对剩余单元格中出现的每个标签, 以 (角点标签 == label) 构造配置索引;
+    3. 按标签分组查表, 顶点取边中点(与 gen_midpoint_from_edge_index 一致).
+    返回 {label: (vertices, faces)}, background 指定的标签不生成网格.
+'''
+def extract_labels(labels, background=0):
+    labels = np.asarray(labels)
+    if labels.ndim != 3 or min(labels.shape) < 2:
+        raise ValueError("extract_labels: labels must be 3D with at least 2 samples per axis, got shape {shape}".format(shape=labels.shape))
+    if labels.dtype.kind not in "iub":
+        raise ValueError("extract_labels: labels must have an integer dtype, got {dtype}".format(dtype=labels.dtype))
+    nx, ny, nz = labels.shape
+    corners = []
+    for vindex in range(8):
+        ox, oy, oz = corner_offsets[vindex]
+        corners.append(labels[ox:ox + nx - 1, oy:oy + ny - 1, oz:oz + nz - 1])
+
+    mixed = np.zeros(corners[0].shape, dtype=bool)
+    for vindex in range(1, 8):
+        mixed |= corners[vindex] != corners[0]
+    cell_ids = np.flatnonzero(mixed)
+    if len(cell_ids) == 0:
+        return {}
+    cell_labels = np.stack([corners[vindex].reshape(-1)[cell_ids] for vindex in range(8)], axis=1)
+
+    # 单元格内出现的 (cell, label) 对
+    pair_cells = np.repeat(np.arange(len(cell_ids)), 8)
+    pair_labels = cell_labels.reshape(-1).astype(np.int64)
+    order = np.lexsort((pair_cells, pair_labels))
+    pair_cells = pair_cells[order]
+    pair_labels = pair_labels[order]
+    keep = np.ones(len(order), dtype=bool)
+    keep[1:] = (pair_cells[1:] != pair_cells[:-1]) | (pair_labels[1:] != pair_labels[:-1])
+    pair_cells = pair_cells[keep]
+    pair_labels = pair_labels[keep]
+    if background is not None:
+        keep = pair_labels != background
+        pair_cells = pair_cells[keep]
+        pair_labels = pair_labels[keep]
+    if len(pair_labels) == 0:
+        return {}
+
+    bits = (1 << np.arange(8)).astype(np.uint8)
+    pair_cases = ((cell_labels[pair_cells] == pair_labels[:, None]) * bits).sum(axis=1).astype(np.uint8)
+
+    meshes = {}
+    starts = np.flatnonzero(np.r_[True, pair_labels[1:] != pair_labels[:-1]])
+    ends = np.r_[starts[1:], len(pair_labels)]
+    for i in range(len(starts)):
+        s, e = starts[i], ends[i]
+        edge_ids = emit_cell_edges(cell_ids[pair_cells[s:e]], pair_cases[s:e], labels.shape)
+        # 每个标签的边编号很稀疏, 用 np.unique 焊接, 避免每个标签都扫描整个体数据大小的映射表
+        unique_ids, faces = weld_edges(edge_ids)
+        meshes[labels.dtype.type(pair_labels[s])] = (midpoint_edges(unique_ids, labels.shape), faces)
+    return meshes
+
+'''
+    三角形带输出: 按 generate_strip_tables 的带表展开, 返回 (vertices, strips),
+    strips 为一维顶点编号, -1 为带的重启标记(转成 uint32 后即 0xFFFFFFFF 的 primitive restart).
+    顶点与 extract_surface 相同; 带不跨单元格, strips_to_faces 展开后与 extract_surface 的三角形一致.
+'''
+def load_strip_tables():
+    tables = load_tables()
+    if "strip" not in tables:
+        strips = np.array(lut.generate_strip_tables(tables["triangle"].tolist()), dtype=np.int8)
+        lengths = np.count_nonzero(strips != -1, axis=1)
+        # 非空行末尾补一个重启标记, 相邻单元格的带也被隔开
+        rows = np.flatnonzero(lengths)
+        strips[rows, lengths[rows]] = lut.strip_restart_index
+        tables["strip"] = strips
+        tables["strip_length"] = np.where(lengths > 0, lengths + 1, 0).astype(np.int64)
+    return tables
+
+def extract_strips(volume, isovalue=0.0):
+    volume = np.asarray(volume)
+    if volume.ndim != 3 or min(volume.shape) < 2:
+        raise ValueError("extract_strips: volume must be 3D with at least 2 samples per axis, got shape {shape}".format(shape=volume.shape))
+    tables = load_strip_tables()
+    cell_ids, cases = active_cells(classify_cells(below_isovalue(volume, isovalue)))
+    entries = tables["strip"][cases]
+    counts = tables["strip_length"][cases]
+    entries = entries[entries != -1]
+    restart = entries == lut.strip_restart_index
+    origins = np.repeat(cell_origins_from_ids(cell_ids, volume.shape), counts)
+    edge_ids = origins[~restart] + edge_id_deltas(volume.shape)[entries[~restart]]
+    unique_ids, indices = weld_edges(edge_ids, 3 * volume.size, width=1)
+    strips = np.full(len(entries), -1, dtype=np.int64)
+    strips[~restart] = indices.reshape(-1)
+    return interpolate_edges(volume, unique_ids, isovalue), strips[:-1]
+
+def strips_to_faces(strips):
+    strips = np.asarray(strips, dtype=np.int64)
+    if len(strips) < 3:
+        return np.zeros((0, 3), dtype=np.int64)
+    restart = strips < 0
+    # 每个位置在所在带中的序号决定奇偶, 奇数位置交换前两个顶点
+    last = np.maximum.accumulate(np.where(restart, np.arange(len(strips)), -1))
+    k = np.arange(len(strips) - 2)
+    odd = (k - last[:-2] - 1) % 2 == 1
+    faces = np.stack([np.where(odd, strips[1:-1], strips[:-2]), np.where(odd, strips[:-2], strips[1:-1]), strips[2:]], axis=1)
+    return faces[~(restart[:-2] | restart[1:-1] | restart[2:])]
+
+'''
+    位压缩占用体提取: packed = np.packbits(mask, axis=0), shape 为原 mask 的 (X, Y, Z).
+    沿 x 每 64 个体素拼成一个 uint64 字, 8 个角点各对应一个字平面(x+1 的角点为整体右移一位并从下一个字借位),
+    对 8 个平面做 OR/AND 得到每个字中 64 个单元格是否有效, 只对有效单元格逐位拼出配置索引.
+    占用(1)的角点置位, 顶点取边中点, 法线指向未占用一侧.
+'''
+bit_reverse_table = np.array([int("{0:08b}".format(i)[::-1], 2) for i in range(256)], dtype=np.uint8)
+
+def packed_words(packed, shape, bitorder):
+    # (Xb, Y, Z) -> (Y, Z, W) uint64, 字内第 j 位对应 x = 64 * w + j
+    if bitorder == "big":
+        packed = bit_reverse_table[packed]
+    elif bitorder != "little":
+        raise ValueError("extract_packed: bitorder must be 'big' or 'little', got {bitorder}".format(bitorder=bitorder))
+    nbytes = (shape[0] + 63) // 64 * 8
+    columns = np.zeros((shape[1], shape[2], nbytes), dtype=np.uint8)
+    columns[:, :, :packed.shape[0]] = np.moveaxis(packed, 0, -1)
+    return columns.view("<u8")
+
+def packed_corner_plane(words, vindex, shape, start, stop):
+    # 单元格行 y in [start, stop) 上角点 vindex 的位平面
+    ox, oy, oz = corner_offsets[vindex]
+    plane = words[start + oy:stop + oy, oz:oz + shape[2] - 1]
+    if ox:
+        carry = np.zeros_like(plane)
+        carry[:, :, :-1] = plane[:, :, 1:] << np.uint64(63)
+        plane = (plane >> np.uint64(1)) | carry
+    return plane
+
+# extract_packed 每段的字数(每个角点平面 512KB)
+packed_slab_words = 1 << 16
+
+def extract_packed(packed, shape, bitorder="big"):
+    packed = np.asarray(packed)
+    shape = tuple(int(n) for n in shape)
+    if len(shape) != 3 or min(shape) < 2:
+        raise ValueError("extract_packed: shape must be 3D with at least 2 samples per axis, got {shape}".format(shape=shape))
+    if packed.dtype != np.uint8 or packed.shape != ((shape[0] + 7) // 8, shape[1], shape[2]):
+        raise ValueError("extract_packed: packed must be np.packbits(mask, axis=0) of a {shape} mask, got {dtype} {packed_shape}".format(shape=shape, dtype=packed.dtype, packed_shape=packed.shape))
+    words = packed_words(packed, shape, bitorder)
+
+    # 只保留 x < X-1 的单元格位
+    valid = np.zeros(words.shape[2], dtype=np.uint64)
+    for w in range(words.shape[2]):
+        count = min(max(shape[0] - 1 - 64 * w, 0), 64)
+        valid[w] = np.uint64((1 << count) - 1)
+    # 按 y 分段处理, 同时存在的只有一段的8个角点平面
+    rows = max(packed_slab_words // ((shape[2] - 1) * words.shape[2]), 1)
+    slab_cells = []
+    slab_cases = []
+    for start in range(0, shape[1] - 1, rows):
+        stop = min(start + rows, shape[1] - 1)
+        planes = [packed_corner_plane(words, vindex, shape, start, stop) for vindex in range(8)]
+        any_set = planes[0] | planes[1]
+        all_set = planes[0] & planes[1]
+        for plane in planes[2:]:
+            any_set |= plane
+            all_set &= plane
+        any_set &= ~all_set
+        any_set &= valid
+        wy, wz, ww = np.nonzero(any_set)
+        if len(wy) == 0:
+            continue
+
+        # 有效字 -> 有效单元格(字内位号)
+        bits = np.unpackbits(any_set[wy, wz, ww].view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+        word_index, bit = np.nonzero(bits)
+        bit = bit.astype(np.uint64)
+        cases = np.zeros(len(word_index), dtype=np.uint8)
+        for vindex in range(8):
+            plane = planes[vindex][wy, wz, ww][word_index]
+            cases |= (((plane >> bit) & np.uint64(1)).astype(np.uint8) << vindex)
+        cx = ww[word_index].astype(np.int64) * 64 + bit.astype(np.int64)
+        slab_cells.append((cx * (shape[1] - 1) + start + wy[word_index]) * (shape[2] - 1) + wz[word_index])
+        slab_cases.append(cases)
+    if not slab_cells:
+        return np.zeros((0, 3)), np.zeros((0, 3), dtype=np.int64)
+    cell_ids = np.concatenate(slab_cells)
+    cases = np.concatenate(slab_cases)
+    order = np.argsort(cell_ids)
+    edge_ids = emit_cell_edges(cell_ids[order], cases[order], shape)
+    # 切割边只占整个体的很小一部分, 用 np.unique 焊接, 不分配整个体数据大小的映射表
+    unique_ids, faces = weld_edges(edge_ids)
+    return midpoint_edges(unique_ids, shape), faces
+
+'''
+    从种子出发沿曲面扩散的提取, 只访问种子所在连通分量经过的单元格:
+    配置的某个面上角点不全相同时曲面穿过该面, 把面另一侧的单元格加入下一轮;
+    每轮对整个波前向量化处理. seeds 为网格坐标 (N, 3), 种子所在单元格没有被切割时按面相邻关系向六个方向
+    逐层搜索(最多 seed_search_radius 层), 取最先到达的一层中离种子最近的有效单元格; 仍没有时该种子不产生网格(不跳到远处无关的分量).
+'''
+# 每个面外侧相邻单元格的偏移: 面上4个角点共有的坐标 (-1/1) 即偏移方向
+facet_neighbor_offsets = np.zeros((6, 3), dtype=np.int64)
+for findex in range(6):
+    corners = np.array([lut.vertices[vindex] for vindex in lut.facets[findex]])
+    for k in range(3):
+        if np.all(corners[:, k] == corners[0, k]):
+            facet_neighbor_offsets[findex, k] = int(corners[0, k])
+
+def load_face_masks():
+    tables = load_tables()
+    if "cut_faces" not in tables:
+        masks = np.zeros(256, dtype=np.uint8)
+        for value in range(256):
+            for findex in range(6):
+                bits = [lut.has_bit(value, vindex) for vindex in lut.facets[findex]]
+                if any(bits) and not all(bits):
+                    masks[value] |= 1 << findex
+        tables["cut_faces"] = masks
+    return tables
+
+def cell_cases(volume, coords, isovalue):
+    cases = np.zeros(len(coords), dtype=np.uint8)
+    for vindex in range(8):
+        p = coords + corner_offsets[vindex]
+        cases |= below_isovalue(volume[p[:, 0], p[:, 1], p[:, 2]], isovalue).astype(np.uint8) << vindex
+    return cases
+
+seed_search_radius = 32
+
+def manhattan_shell(radius):
+    # 与原点曼哈顿距离恰为 radius 的偏移, 即面相邻广度优先搜索的第 radius 层
+    r = np.arange(-radius, radius + 1)
+    xy = np.stack(np.meshgrid(r, r, indexing="ij"), axis=-1).reshape(-1, 2)
+    rest = radius - np.abs(xy).sum(axis=1)
+    xy = xy[rest >= 0]
+    rest = rest[rest >= 0]
+    return np.concatenate([np.column_stack([xy, rest]), np.column_stack([xy, -rest])[rest > 0]])
+
+def seed_cells(volume, seeds, isovalue):
+    cells = np.array(volume.shape) - 1
+    points = np.asarray(seeds, dtype=np.float64).reshape(-1, 3)
+    coords = np.clip(np.floor(points).astype(np.int64), 0, cells - 1)
+    found = []
+    for point, coord in zip(points, coords):
+        # 体数据是凸的长方体, 越界的偏移直接丢弃即可, 层号仍是面相邻的步数
+        for radius in range(seed_search_radius + 1):
+            shell = coord + manhattan_shell(radius)
+            shell = shell[np.all((shell >= 0) & (shell < cells), axis=1)]
+            cases = cell_cases(volume, shell, isovalue)
+            hits = shell[(cases != 0) & (cases != 255)]
+            if len(hits):
+                distances = ((hits + 0.5 - point) ** 2).sum(axis=1)
+                found.append(hits[np.argmin(distances)])
+                break
+    return np.array(found, dtype=np.int64).reshape(-1, 3)
+
+def extract_seeded(volume, seeds, isovalue=0.0):
+    volume = np.asarray(volume)
+    if volume.ndim != 3 or min(volume.shape) < 2:
+        raise ValueError("extract_seeded: volume must be 3D with at least 2 samples per axis, got shape {shape}".format(shape=volume.shape))
+    tables = load_face_masks()
+    cells = np.array(volume.shape, dtype=np.int64) - 1
+    frontier = seed_cells(volume, seeds, isovalue)
+    # 访问标记只在被写到的页上实际占用内存
+    visited = np.zeros(cells[0] * cells[1] * cells[2], dtype=bool)
+    found_ids = []
+    found_cases = []
+    while len(frontier):
+        ids = (frontier[:, 0] * cells[1] + frontier[:, 1]) * cells[2] + frontier[:, 2]
+        ids, first = np.unique(ids, return_index=True)
+        frontier = frontier[first]
+        fresh = ~visited[ids]
+        ids = ids[fresh]
+        frontier = frontier[fresh]
+        visited[ids] = True
+        cases = cell_cases(volume, frontier, isovalue)
+        keep = (cases != 0) & (cases != 255)
+        frontier = frontier[keep]
+        found_ids.append(ids[keep])
+        found_cases.append(cases[keep])
+        masks = tables["cut_faces"][cases[keep]]
+        neighbors = []
+        for findex in range(6):
+            step = frontier[(masks >> findex) & 1 == 1] + facet_neighbor_offsets[findex]
+            inside = np.all((step >= 0) & (step < cells), axis=1)
+            neighbors.append(step[inside])
+        frontier = np.concatenate(neighbors)
+    if not found_ids:
+        return np.zeros((0, 3)), np.zeros((0, 3), dtype=np.int64)
+    cell_ids = np.concatenate(found_ids)
+    cases = np.concatenate(found_cases)
+    edge_ids = emit_cell_edges(cell_ids, cases, volume.shape)
+    # 稀疏的边编号用 np.unique 焊接, 不触及整个体数据大小的数组
+    unique_ids, faces = weld_edges(edge_ids)
+    return interpolate_edges(volume, unique_ids, isovalue), faces
+
+'''
+    小块批量提取: volumes 为 (N, X, Y, Z) 数组或同尺寸数组的列表.
+    每组块一次完成分类/查表/插值, 全局边编号带上块编号, 因此一次焊接即可处理组内所有块.
+    返回 (vertices, faces, vertex_offsets, face_offsets):
+    第 i 块的顶点为 vertices[vertex_offsets[i]:vertex_offsets[i+1]] (块内坐标),
+    三角形为 faces[face_offsets[i]:face_offsets[i+1]], 索引相对于该块自己的顶点段.
+'''
+def extract_batch(volumes, isovalue=0.0, group_size=None):
+    if isinstance(volumes, (list, tuple)):
+        count = len(volumes)
+        shape = tuple(np.shape(volumes[0])) if count else ()
+    else:
+        volumes = np.asarray(volumes)
+        count = volumes.shape[0] if volumes.ndim == 4 else 0
+        shape = volumes.shape[1:]
+    if count == 0 or len(shape) != 3 or min(shape) < 2:
+        raise ValueError("extract_batch: volumes must be (N, X, Y, Z) with at least 2 samples per axis, got shape {shape}".format(shape=(count,) + tuple(shape)))
+    # 每组约 batch_group_cells 个单元格(32^3 小块每组16个), 每次调用的固定开销摊到整组; 列表输入只在处理该组时拼接
+    if group_size is None:
+        group_size = max(batch_group_cells // ((shape[0] - 1) * (shape[1] - 1) * (shape[2] - 1)), 1)
+    results = []
+    for start in range(0, count, group_size):
+        group = volumes[start:start + group_size]
+        if isinstance(group, (list, tuple)):
+            if any(np.shape(volume) != shape for volume in group):
+                raise ValueError("extract_batch: all volumes must have shape {shape}".format(shape=shape))
+            group = np.stack(group)
+        results.append(extract_batch_group(group, isovalue))
+    vertices = np.concatenate([r[0] for r in results])
+    faces = np.concatenate([r[1] for r in results], dtype=np.int64)
+    vertex_offsets = [np.zeros(1, dtype=np.int64)]
+    face_offsets = [np.zeros(1, dtype=np.int64)]
+    for r in results:
+        vertex_offsets.append(r[2][1:] + vertex_offsets[-1][-1])
+        face_offsets.append(r[3][1:] + face_offsets[-1][-1])
+    return vertices, faces, np.concatenate(vertex_offsets), np.concatenate(face_offsets)
+
+batch_group_cells = 1 << 19
+
+def load_batch_index_tables(shape):
+    # 块尺寸固定, 单元格原点, 每种配置的边编号增量行, 每条块内边的端点和起点坐标都按块内编号预先制表,
+    # 每组只做查表, 不再对每个顶点做整数除法和四维下标; 编号用 int32
+    key = ("batch_index",) + tuple(shape)
+    if key not in lut_cache:
+        tables = load_tables()
+        size = shape[0] * shape[1] * shape[2]
+        points, axis = edge_endpoints(np.arange(3 * size), shape)
+        others = points + axis_units[axis]
+        valid = tables["triangle"] >= 0
+        lut_cache[key] = {
+            "cell_origin": cell_origins_from_ids(np.arange((shape[0] - 1) * (shape[1] - 1) * (shape[2] - 1)), shape).astype(np.int32),
+            "delta_rows": np.where(valid, edge_id_deltas(shape)[np.maximum(tables["triangle"], 0)], 0).astype(np.int32),
+            "valid_rows": valid,
+            "point0": ((points[:, 0] * shape[1] + points[:, 1]) * shape[2] + points[:, 2]).astype(np.int32),
+            "point1": ((others[:, 0] * shape[1] + others[:, 1]) * shape[2] + others[:, 2]).astype(np.int32),
+            "position": points.astype(np.float64),
+            "axis": axis,
+        }
+    return lut_cache[key]
+
+def extract_batch_group(volumes, isovalue):
+    count = volumes.shape[0]
+    shape = volumes.shape[1:]
+    cells_per_chunk = (shape[0] - 1) * (shape[1] - 1) * (shape[2] - 1)
+    size = shape[0] * shape[1] * shape[2]
+    edges_per_chunk = 3 * size
+    total = count * edges_per_chunk
+    index = load_batch_index_tables(shape)
+    # 边编号按 块 * edges_per_chunk + 块内边编号 排列, 组内不超过 int32 时用 int32
+    id_dtype = np.int32 if total < (1 << 31) else np.int64
+
+    cases = classify_cells(below_isovalue(volumes, isovalue))
+    ids, active_cases = active_cells(cases)
+    chunks, local_cells = np.divmod(ids.astype(id_dtype), id_dtype(cells_per_chunk))
+    # 二维表按行取用 take, 比花式索引快数倍
+    rows = index["delta_rows"].take(active_cases, axis=0).astype(id_dtype, copy=False)
+    rows += chunks[:, None] * id_dtype(edges_per_chunk) + index["cell_origin"][local_cells][:, None]
+    edge_ids = rows[index["valid_rows"].take(active_cases, axis=0)]
+
+    # 稠密焊接, 映射表直接给出相对于所在块顶点段的编号, 三角形不需要再减偏移
+    used = np.zeros(total, dtype=bool)
+    used[edge_ids] = True
+    unique_ids = np.flatnonzero(used).astype(id_dtype)
+    vertex_chunks, local_edges = np.divmod(unique_ids, id_dtype(edges_per_chunk))
+    vertex_offsets = np.searchsorted(vertex_chunks, np.arange(count + 1))
+    remap = np.empty(total, dtype=id_dtype)
+    remap[unique_ids] = np.arange(len(unique_ids), dtype=id_dtype) - vertex_offsets[vertex_chunks].astype(id_dtype)
+    faces = remap[edge_ids].reshape(-1, 3)
+
+    flat = volumes.reshape(-1)
+    offsets = vertex_chunks.astype(np.int64) * size
+    value0 = flat[offsets + index["point0"][local_edges]]
+    value1 = flat[offsets + index["point1"][local_edges]]
+    vertices = index["position"].take(local_edges, axis=0)
+    vertices.reshape(-1)[3 * np.arange(len(local_edges)) + index["axis"][local_edges]] += edge_fractions(value0, value1, isovalue)
+
+    face_counts = np.bincount(chunks, weights=load_tables()["triangle_count"][active_cases], minlength=count)
+    face_offsets = np.concatenate([[0], np.cumsum(face_counts)]).astype(np.int64)
+    return vertices, faces, vertex_offsets, face_offsets
+
+'''
+    调优配置: brick_volume/extract_bricks 的参数为 None 时从配置文件读取(由 mc_autotune.py 生成),
+    路径为环境变量 MC_EXTRACTOR_PROFILE, 未设置时为当前目录下的 mc_profile.json; 文件不存在时用 default_profile.
+    backend: "serial" 在当前线程处理, "thread"/"process" 用 workers 个线程/进程并行处理块组.
+'''
+default_profile = {"brick_size": 16, "group_size": 16, "backend": "serial", "workers": 1}
+profile_backends = ["serial", "thread", "process"]
+profile_cache = {}
+
+def profile_path():
+    return os.environ.get("MC_EXTRACTOR_PROFILE", "mc_profile.json")
+
+def load_profile(path=None):
+    path = path or profile_path()
+    if path not in profile_cache:
+        profile = dict(default_profile)
+        if os.path.exists(path):
+            with open(path) as fp:
+                profile.update(json.load(fp))
+        if profile["backend"] not in profile_backends:
+            raise ValueError("load_profile: unknown backend {backend} in {path}".format(backend=profile["backend"], path=path))
+        profile_cache[path] = profile
+    return profile_cache[path]
+
+def save_profile(profile, path=None):
+    path = path or profile_path()
+    with open(path, "w") as fp:
+        json.dump(profile, fp, indent=2, sort_keys=True)
+    profile_cache.pop(path, None)
+    return path
+
+def new_executor(backend, workers):
+    if backend == "serial":
+        return None
+    if backend == "thread":
+        return concurrent.futures.ThreadPoolExecutor(workers)
+    if backend == "process":
+        return concurrent.futures.ProcessPoolExecutor(workers)
+    raise ValueError("new_executor: unknown backend {backend}, expected one of {backends}".format(backend=backend, backends=", ".join(profile_backends)))
+
+'''
+    Morton 序分块布局: 体数据一次性切成 brick_size^3 个单元格的块(每块多存一层样本, 块内自包含),
+    块按块坐标的 Morton(Z-order) 码排列并记录每块的最小/最大值, 同一份布局可用于任意 isovalue.
+    extract_bricks 按 Morton 序成组处理包含 isovalue 的块, 分类/焊接/插值只访问组内连续存放的块.
+    块间共享面上的边只归一个块(+k 方向的相邻块), 不做整个体数据的全局焊接, 只有块面上的顶点
+    按全局边编号排序查回; 顶点集合与 extract_surface 相同, 顶点和三角形都按块的遍历顺序排列.
+    给出 executor 或 backend 时块组并行处理, 同时在途的块组不超过 2 * workers 个.
+'''
+def brick_volume(volume, brick_size=None):
+    volume = np.asarray(volume)
+    if brick_size is None:
+        brick_size = load_profile()["brick_size"]
+    if volume.ndim != 3 or min(volume.shape) < 2:
+        raise ValueError("brick_volume: volume must be 3D with at least 2 samples per axis, got shape {shape}".format(shape=volume.shape))
+    if brick_size <= 0:
+        raise ValueError("brick_volume: brick_size must be positive, got {size}".format(size=brick_size))
+    counts = [(n - 2) // brick_size + 1 for n in volume.shape]
+    # 末尾补齐到整块, 补出的单元格在提取时丢弃; 按边缘复制补齐不改变每块的取值范围
+    padded = np.pad(volume, [(0, counts[k] * brick_size + 1 - volume.shape[k]) for k in range(3)], mode="edge")
+    windows = np.lib.stride_tricks.sliding_window_view(padded, (brick_size + 1,) * 3)[::brick_size, ::brick_size, ::brick_size]
+    coords = np.stack(np.meshgrid(*[np.arange(c) for c in counts], indexing="ij"), axis=-1).reshape(-1, 3)
+    coords = coords[np.argsort(mc_mesh_order.morton_codes(coords), kind="stable")]
+    bricks = windows[coords[:, 0], coords[:, 1], coords[:, 2]]
+    flat = bricks.reshape(len(bricks), -1)
+    return {"bricks": bricks, "origins": coords * brick_size, "mins": flat.min(axis=1), "maxs": flat.max(axis=1),
+        "shape": volume.shape, "brick_size": brick_size}
+
+def extract_brick_group(bricks, origins, shape, isovalue):
+    count = len(bricks)
+    brick_shape = bricks.shape[1:]
+    cells_per_brick = (brick_shape[0] - 1) * (brick_shape[1] - 1) * (brick_shape[2] - 1)
+    size = brick_shape[0] * brick_shape[1] * brick_shape[2]
+    edges_per_brick = 3 * size
+    total = count * edges_per_brick
+    # 块与 extract_batch 的小块相同: 共用按块内编号预先制表的边增量/端点/坐标, 组内编号用 int32
+    index = load_batch_index_tables(brick_shape)
+    id_dtype = np.int32 if total < (1 << 31) else np.int64
+    cases = classify_cells(below_isovalue(bricks, isovalue))
+    # 只有体数据末端的块含补齐出的单元格, 把这些块超出的部分清成空配置
+    limits = np.array(shape) - 1 - origins
+    for k in np.flatnonzero(np.any(limits < np.array(brick_shape) - 1, axis=1)):
+        cases[k, limits[k, 0]:] = 0
+        cases[k, :, limits[k, 1]:] = 0
+        cases[k, :, :, limits[k, 2]:] = 0
+    ids, cases = active_cells(cases)
+    owners, local_cells = np.divmod(ids.astype(id_dtype), id_dtype(cells_per_brick))
+    # 二维表按行取用 take, 比花式索引快数倍
+    rows = index["delta_rows"].take(cases, axis=0).astype(id_dtype, copy=False)
+    rows += owners[:, None] * id_dtype(edges_per_brick) + index["cell_origin"][local_cells][:, None]
+    edge_ids = rows[index["valid_rows"].take(cases, axis=0)]
+    used = np.zeros(total, dtype=bool)
+    used[edge_ids] = True
+    unique_ids = np.flatnonzero(used).astype(id_dtype)
+    vertex_bricks, local_edges = np.divmod(unique_ids, id_dtype(edges_per_brick))
+
+    # 块间共享面上的边只归一个块: 落在块的 +k 面且 +k 方向还有块时归相邻块(外来顶点), 否则归本块;
+    # 落在块的 -k 面且 -k 方向还有块的自有顶点可能被前一块引用, 只有这两类需要全局边编号
+    # 面位: 低3位为 -k 面, 高3位为 +k 面; 每块只保留相邻块存在的方向
+    neighbor_bits = ((origins > 0) << np.arange(3)).sum(axis=1) | ((origins + np.array(brick_shape) - 1 < np.array(shape) - 1) << np.arange(3, 6)).sum(axis=1)
+    bits = load_brick_face_bits(brick_shape)[local_edges] & neighbor_bits.astype(np.uint8)[vertex_bricks]
+    foreign = bits >= 8
+    owned = np.flatnonzero(~foreign)
+    foreign = np.flatnonzero(foreign)
+    shared = np.flatnonzero((bits != 0) & (bits < 8))
+    # 自有顶点编号 0..n-1, 外来顶点接在后面, 由 extract_bricks 在最后按全局边编号查回
+    slots = np.empty(len(unique_ids), dtype=id_dtype)
+    slots[owned] = np.arange(len(owned), dtype=id_dtype)
+    slots[foreign] = np.arange(len(owned), len(unique_ids), dtype=id_dtype)
+    remap = np.empty(total, dtype=id_dtype)
+    remap[unique_ids] = slots
+    faces = remap[edge_ids]
+    foreign_refs = np.flatnonzero(faces >= len(owned))
+    origin_ids = (origins[:, 0] * shape[1] + origins[:, 1]) * shape[2] + origins[:, 2]
+    global_edges = brick_global_edge_ids(brick_shape, shape)
+    foreign_ids = global_edges[local_edges[foreign]] + origin_ids[vertex_bricks[foreign]]
+    shared_ids = global_edges[local_edges[shared]] + origin_ids[vertex_bricks[shared]]
+
+    vertex_bricks = vertex_bricks[owned]
+    local_edges = local_edges[owned]
+    flat = bricks.reshape(-1)
+    offsets = vertex_bricks.astype(np.int64) * size
+    value0 = flat[offsets + index["point0"][local_edges]]
+    value1 = flat[offsets + index["point1"][local_edges]]
+    axis = index["axis"][local_edges]
+    positions = index["position"].take(local_edges, axis=0)
+    positions += origins.astype(np.float64).take(vertex_bricks, axis=0)
+    positions.reshape(-1)[3 * np.arange(len(axis)) + axis] += edge_fractions(value0, value1, isovalue)
+    return positions, faces, foreign_refs, faces[foreign_refs] - len(owned), foreign_ids, shared_ids, slots[shared]
+
+def load_brick_face_bits(brick_shape):
+    # 块内每条边落在块的哪些 -k 面(低3位)和 +k 面(高3位)上, 沿边方向的面不计
+    key = ("brick_faces",) + tuple(brick_shape)
+    if key not in lut_cache:
+        points, axis = edge_endpoints(np.arange(3 * brick_shape[0] * brick_shape[1] * brick_shape[2]), brick_shape)
+        across = axis[:, None] != np.arange(3)
+        low = (((points == 0) & across) << np.arange(3)).sum(axis=1)
+        high = (((points == np.array(brick_shape) - 1) & across) << np.arange(3, 6)).sum(axis=1)
+        lut_cache[key] = (low | high).astype(np.uint8)
+    return lut_cache[key]
+
+def brick_global_edge_ids(brick_shape, shape):
+    # 块内边编号 -> 原点在 (0, 0, 0) 的块在整个体数据中的全局边编号, 其它块加上块原点的线性编号即可
+    key = ("brick_global",) + tuple(brick_shape) + tuple(shape)
+    if key not in lut_cache:
+        points, axis = edge_endpoints(np.arange(3 * brick_shape[0] * brick_shape[1] * brick_shape[2]), brick_shape)
+        lut_cache[key] = axis * (shape[0] * shape[1] * shape[2]) + (points[:, 0] * shape[1] + points[:, 1]) * shape[2] + points[:, 2]
+    return lut_cache[key]
+
+def brick_group_results(bricked, isovalue, group_size, executor, max_in_flight):
+    shape = bricked["shape"]
+    active = np.flatnonzero(below_isovalue(bricked["mins"], isovalue) & ~below_isovalue(bricked["maxs"], isovalue))
+    groups = [active[start:start + group_size] for start in range(0, len(active), group_size)]
+    if executor is None:
+        for group in groups:
+            yield extract_brick_group(bricked["bricks"][group], bricked["origins"][group], shape, isovalue)
+        return
+    pending = collections.deque()
+    for group in groups:
+        pending.append(executor.submit(extract_brick_group, bricked["bricks"][group], bricked["origins"][group], shape, isovalue))
+        if len(pending) >= max_in_flight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def extract_bricks(bricked, isovalue=0.0, group_size=None, backend=None, workers=None, executor=None):
+    load_tables()
+    profile = load_profile()
+    group_size = group_size or profile["group_size"]
+    workers = workers or profile["workers"]
+    own_executor = None
+    if executor is None:
+        executor = own_executor = new_executor(backend or profile["backend"], workers)
+    results = []
+    try:
+        for result in brick_group_results(bricked, isovalue, group_size, executor, 2 * workers):
+            results.append(result)
+    finally:
+        if own_executor is not None:
+            own_executor.shutdown(cancel_futures=True)
+    if not results:
+        return np.zeros((0, 3)), np.zeros((0, 3), dtype=np.int64)
+    # 各组的三角形一次拼成 int64, 再按组加上自有顶点的偏移; 外来顶点的位置随后整体改写
+    faces = np.concatenate([r[1] for r in results]).astype(np.int64)
+    vertex_offsets = np.cumsum([0] + [len(r[0]) for r in results])
+    face_offsets = np.cumsum([0] + [len(r[1]) for r in results])
+    foreign_offsets = np.cumsum([0] + [len(r[4]) for r in results])
+    for i in range(len(results)):
+        faces[face_offsets[i]:face_offsets[i + 1]] += vertex_offsets[i]
+    # 外来顶点按全局边编号在相邻块的共享顶点中查回, 只排序块面上的顶点
+    shared_ids = np.concatenate([r[5] for r in results])
+    order = np.argsort(shared_ids)
+    shared_slots = np.concatenate([r[6] + vertex_offsets[i] for i, r in enumerate(results)])[order]
+    slots = shared_slots[np.searchsorted(shared_ids[order], np.concatenate([r[4] for r in results]))]
+    refs = np.concatenate([r[2] + face_offsets[i] for i, r in enumerate(results)])
+    faces[refs] = slots[np.concatenate([r[3] + foreign_offsets[i] for i, r in enumerate(results)])]
+    return np.concatenate([r[0] for r in results]), faces.reshape(-1, 3)
+
+'''
+    按 x 方向分片的流式提取, 每次 yield (vertices, faces):
+    vertices 为本片新增的顶点, faces 的索引是整个流上的全局顶点编号.
+    相邻片共享的 x 平面上的边只在前一片输出一次, 后一片通过平面上的边键查回其顶点编号,
+    因此只需保留一个平面的映射, 整个网格不会同时驻留内存.
+'''
+def extract_chunks(volume, isovalue=0.0, slab_size=32, stats=None, spacing=None, coordinates=None):
+    volume = np.asarray(volume)
+    if volume.ndim != 3 or min(volume.shape) < 2:
+        raise ValueError("extract_chunks: volume must be 3D with at least 2 samples per axis, got shape {shape}".format(shape=volume.shape))
+    axes = grid_axes(volume.shape, spacing, coordinates)
+    load_tables()
+    state = new_stitch_state()
+    for x0, x1 in slab_ranges(volume.shape, slab_size):
+        points, axis, fresh, vertices, faces = mesh_slab(volume, x0, x1, isovalue, stats)
+        start = time.perf_counter() if stats is not None else None
+        faces = stitch_slab(state, volume.shape, x1 - x0, points, axis, fresh, faces)
+        vertices = grid_to_world(vertices, axes)
+        if stats is not None:
+            record_stage(stats, "vertices", start, faces)
+        yield vertices, faces
+
+def slab_ranges(shape, slab_size):
+    return [(x0, min(x0 + slab_size, shape[0] - 1)) for x0 in range(0, shape[0] - 1, slab_size)]
+
+def mesh_slab(volume, x0, x1, isovalue, stats=None):
+    # 与其它片无关的部分(可在线程池中并行): 分类/查表/焊接, 并插值本片新增的顶点
+    slab = volume[x0:x1 + 1]
+    start = time.perf_counter() if stats is not None else None
+    cases = classify_cells(below_isovalue(slab, isovalue))
+    cell_ids, active_cases = active_cells(cases)
+    start = record_stage(stats, "classify", start, cases, cell_ids)
+    record_cases(stats, cases, cell_ids)
+    edge_ids = emit_cell_edges(cell_ids, active_cases, slab.shape)
+    start = record_stage(stats, "emit", start, edge_ids)
+    unique_ids, faces = weld_edges(edge_ids, 3 * slab.size)
+    start = record_stage(stats, "weld", start, unique_ids, faces)
+    points, axis = edge_endpoints(unique_ids, slab.shape)
+    fresh = ~((points[:, 0] == 0) & (axis != 0) & (x0 > 0))
+    others = points[fresh] + axis_units[axis[fresh]]
+    value0 = slab[points[fresh, 0], points[fresh, 1], points[fresh, 2]]
+    value1 = slab[others[:, 0], others[:, 1], others[:, 2]]
+    vertices = interpolate_points(points[fresh], axis[fresh], value0, value1, isovalue)
+    vertices[:, 0] += x0
+    if stats is not None:
+        record_stage(stats, "vertices", start, vertices)
+        stats["triangles"] += len(faces)
+    return points, axis, fresh, vertices, faces
+
+def new_stitch_state():
+    return {"vertex_base": 0, "prev_keys": np.zeros(0, dtype=np.int64), "prev_indices": np.zeros(0, dtype=np.int64)}
+
+def stitch_slab(state, shape, width, points, axis, fresh, faces):
+    # 必须按片的顺序调用: 把本片的局部顶点编号换成流上的全局编号, 并记下末平面的映射
+    nx, ny, nz = shape
+    # 平面上(y/z 方向)边的键: axis * ny * nz + py * nz + pz
+    keys = axis * (ny * nz) + points[:, 1] * nz + points[:, 2]
+    shared = ~fresh
+    indices = np.empty(len(points), dtype=np.int64)
+    indices[shared] = state["prev_indices"][np.searchsorted(state["prev_keys"], keys[shared])]
+    indices[fresh] = state["vertex_base"] + np.arange(np.count_nonzero(fresh))
+    state["vertex_base"] += np.count_nonzero(fresh)
+
+    last = (points[:, 0] == width) & (axis != 0)
+    order = np.argsort(keys[last])
+    state["prev_keys"] = keys[last][order]
+    state["prev_indices"] = indices[last][order]
+    return indices[faces]
+
+'''
+    异步分片提取: async for index, vertices, faces in extract_async(volume, isovalue).
+    各片的分类/查表/插值交给 executor(默认为事件循环的线程池), 同时最多 max_in_flight 片在算,
+    消费者不取结果时不会提交新的片(背压). 结果按片的顺序产出, 格式与 extract_chunks 相同,
+    index 为片序号.
+'''
+async def extract_async(volume, isovalue=0.0, slab_size=32, executor=None, max_in_flight=4, spacing=None, coordinates=None):
+    volume = np.asarray(volume)
+    if volume.ndim != 3 or min(volume.shape) < 2:
+        raise ValueError("extract_async: volume must be 3D with at least 2 samples per axis, got shape {shape}".format(shape=volume.shape))
+    axes = grid_axes(volume.shape, spacing, coordinates)
+    if max_in_flight < 1:
+        raise ValueError("extract_async: max_in_flight must be at least 1, got {count}".format(count=max_in_flight))
+    load_tables()
+    loop = asyncio.get_running_loop()
+    slabs = slab_ranges(volume.shape, slab_size)
+    state = new_stitch_state()
+    pending = collections.deque()
+    submitted = 0
+    try:
+        for index in range(len(slabs)):
+            while submitted < len(slabs) and len(pending) < max_in_flight:
+                x0, x1 = slabs[submitted]
+                pending.append(loop.run_in_executor(executor, mesh_slab, volume, x0, x1, isovalue))
+                submitted += 1
+            points, axis, fresh, vertices, faces = await pending.popleft()
+            x0, x1 = slabs[index]
+            yield index, grid_to_world(vertices, axes), stitch_slab(state, volume.shape, x1 - x0, points, axis, fresh, faces)
+    finally:
+        for future in pending:
+            future.cancel()
+
+'''
+    顶点聚类简化: 按 x 分片提取, 每片的顶点立即落到边长 cluster_size 的粗网格单元(簇)中,
+    三角形换成簇编号后丢弃退化(两个顶点同簇)和重复的三角形, 簇的代表点为其中顶点的平均.
+    全分辨率网格只在一片之内存在; 片厚取 cluster_size 的倍数, 共享平面上的顶点只在前一片计入平均.
+'''
+def extract_simplified(volume, isovalue=0.0, cluster_size=4, slab_size=32):
+    volume = np.asarray(volume)
+    if volume.ndim != 3 or min(volume.shape) < 2:
+        raise ValueError("extract_simplified: volume must be 3D with at least 2 samples per axis, got shape {shape}".format(shape=volume.shape))
+    if cluster_size <= 0:
+        raise ValueError("extract_simplified: cluster_size must be positive, got {size}".format(size=cluster_size))
+    load_tables()
+    clusters = np.array([(n - 1) // cluster_size + 1 for n in volume.shape], dtype=np.int64)
+    cluster_count = int(np.prod(clusters))
+    sums = np.zeros((cluster_count, 3))
+    counts = np.zeros(cluster_count, dtype=np.int64)
+    slab_size = max(slab_size // cluster_size, 1) * cluster_size
+    face_chunks = []
+    for x0, x1 in slab_ranges(volume.shape, slab_size):
+        slab = volume[x0:x1 + 1]
+        cell_ids, cases = active_cells(classify_cells(below_isovalue(slab, isovalue)))
+        edge_ids = emit_cell_edges(cell_ids, cases, slab.shape)
+        unique_ids, faces = weld_edges(edge_ids, 3 * slab.size)
+        positions = interpolate_edges(slab, unique_ids, isovalue)
+        positions[:, 0] += x0
+        cells = np.minimum((positions // cluster_size).astype(np.int64), clusters - 1)
+        keys = (cells[:, 0] * clusters[1] + cells[:, 1]) * clusters[2] + cells[:, 2]
+        points, axis = edge_endpoints(unique_ids, slab.shape)
+        fresh = ~((points[:, 0] == 0) & (axis != 0) & (x0 > 0))
+        np.add.at(sums, keys[fresh], positions[fresh])
+        counts += np.bincount(keys[fresh], minlength=cluster_count)
+        faces = keys[faces]
+        keep = (faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) & (faces[:, 2] != faces[:, 0])
+        face_chunks.append(faces[keep])
+    faces = np.concatenate(face_chunks) if face_chunks else np.zeros((0, 3), dtype=np.int64)
+    # 旋转到最小编号在前(不改变绕向)后去重
+    first = np.argmin(faces, axis=1)
+    rows = np.arange(len(faces))[:, None]
+    faces = faces[rows, (first[:, None] + np.arange(3)) % 3]
+    faces = np.unique(faces, axis=0)
+    used = np.flatnonzero(counts)
+    remap = np.zeros(cluster_count, dtype=np.int64)
+    remap[used] = np.arange(len(used))
+    return sums[used] / counts[used][:, None], remap[faces]
+
+'''
+    曲面连通分量: 顶点与全局边编号一一对应, 对顶点对做向量化并查集:
+    每轮先对 parent 的窗口做整段指针跳跃(parent = parent[parent]), 只保留两端根不同的顶点对,
+    再把较大的根挂到较小的根上, 直到没有可合并的顶点对.
+    extract_surface 的顶点对来自查找表: 每个表行内按共用边把三角形分成环, 环内顶点经焊接逆映射直接连成星形,
+    比三角形的边少一半; 流式提取时每块调用 update_components(用三角形的边),
+    块间共享平面上的顶点编号相同, 因此跨块的分量自然合并.
+'''
+def compress_roots(parent, lo=0, hi=None):
+    # parent[lo:hi] 指针跳跃到根
+    window = parent[lo:hi]
+    while True:
+        up = parent[window]
+        if np.array_equal(up, window):
+            return parent
+        window[...] = up
+
+def union_pairs(parent, u, v, lo=0, hi=None):
+    # u, v 中的顶点都在 parent[lo:hi] 内
+    while len(u):
+        compress_roots(parent, lo, hi)
+        ru = parent[u]
+        rv = parent[v]
+        differ = ru != rv
+        u, v, ru, rv = u[differ], v[differ], ru[differ], rv[differ]
+        parent[np.maximum(ru, rv)] = np.minimum(ru, rv)
+    return compress_roots(parent, lo, hi)
+
+def load_component_pairs(table="triangle"):
+    # 每行的环: 环内第一个表项位置与环内其余每条边第一次出现的位置成对, -1 补齐
+    tables = load_extended_tables() if table == "extended" else load_tables()
+    if table + "_pair_u" not in tables:
+        rows = []
+        for row in tables[table]:
+            entries = [int(e) for e in row if e >= 0]
+            first = {}
+            for position, e in enumerate(entries):
+                first.setdefault(e, position)
+            owner = {e: e for e in first}
+            for t in range(0, len(entries), 3):
+                roots = []
+                for e in entries[t:t + 3]:
+                    while owner[e] != e:
+                        e = owner[e]
+                    roots.append(e)
+                for e in roots[1:]:
+                    owner[e] = roots[0]
+            pairs = []
+            for e in first:
+                root = e
+                while owner[root] != root:
+                    root = owner[root]
+                if root != e:
+                    pairs.append((first[root], first[e]))
+            rows.append(pairs)
+        width = max(len(pairs) for pairs in rows)
+        pair_u = np.full((len(rows), width), -1, dtype=np.int8)
+        pair_v = np.full((len(rows), width), -1, dtype=np.int8)
+        for index, pairs in enumerate(rows):
+            if pairs:
+                pair_u[index, :len(pairs)], pair_v[index, :len(pairs)] = zip(*pairs)
+        tables[table + "_pair_u"] = pair_u
+        tables[table + "_pair_v"] = pair_v
+    return tables
+
+def relabel_components(parent, face_vertices):
+    # 根按最小顶点编号排序后编号, 返回 (每个三角形的分量编号 0..C-1, 每个分量的三角形数)
+    is_root = parent == np.arange(len(parent))
+    face_components = (np.cumsum(is_root) - 1)[parent[face_vertices]]
+    return face_components, np.bincount(face_components, minlength=int(np.count_nonzero(is_root)))
+
+def cell_components(faces, rows, vertex_count, table="triangle"):
+    # faces 为按单元格顺序生成、焊接后的三角形, rows 为每个有效单元格的表行
+    tables = load_component_pairs(table)
+    counts = tables[table + "_count"][rows] * 3
+    offsets = (np.cumsum(counts) - counts)[:, None]
+    pair_u = tables[table + "_pair_u"][rows]
+    mask = pair_u >= 0
+    flat = faces.reshape(-1)
+    u = flat.take((offsets + pair_u)[mask])
+    v = flat.take((offsets + tables[table + "_pair_v"][rows])[mask])
+    parent = union_pairs(np.arange(vertex_count), u, v)
+    return relabel_components(parent, flat[::3])
+
+def new_components():
+    return {"parent": np.zeros(0, dtype=np.int64), "count": 0, "face_vertices": []}
+
+def update_components(state, vertex_count, faces):
+    # vertex_count 为本块新增的顶点数(与 extract_chunks 产出的 vertices 一致), parent 按倍增扩容
+    start = state["count"]
+    end = start + vertex_count
+    if end > len(state["parent"]):
+        parent = np.empty(max(end, 2 * len(state["parent"])), dtype=np.int64)
+        parent[:start] = state["parent"][:start]
+        state["parent"] = parent
+    state["parent"][start:end] = np.arange(start, end)
+    state["count"] = end
+    faces = np.asarray(faces, dtype=np.int64)
+    if len(faces):
+        # 本块三角形只引用本块顶点和相邻块共享平面上的顶点, 只压缩这一段窗口
+        u = np.concatenate([faces[:, 0], faces[:, 1]])
+        v = np.concatenate([faces[:, 1], faces[:, 2]])
+        union_pairs(state["parent"], u, v, int(faces.min()), end)
+    state["face_vertices"].append(faces[:, 0])
+    return state
+
+def finish_components(state):
+    face_vertices = np.concatenate(state["face_vertices"]) if state["face_vertices"] else np.zeros(0, dtype=np.int64)
+    parent = compress_roots(state["parent"][:state["count"]])
+    return relabel_components(parent, face_vertices)
+
+def label_components(faces, vertex_count):
+    return finish_components(update_components(new_components(), vertex_count, faces))
+
+def remove_small_components(vertices, faces, min_triangles):
+    face_components, counts = label_components(faces, len(vertices))
+    faces = faces[counts[face_components] >= min_triangles]
+    used = np.zeros(len(vertices), dtype=bool)
+    used[faces] = True
+    remap = np.cumsum(used) - 1
+    return vertices[used], remap[faces]
+
+'''
+    边中点顶点下每种配置的常量贡献(局部坐标 q, 单元格原点 c):
+    面积 = sum |(q1-q0) x (q2-q0)| / 2
+    体积 = sum det(c+q0, c+q1, c+q2) / 6 = (D + c . N) / 6,
+    其中 D = sum det(q0, q1, q2), N = sum (q1-q0) x (q2-q0), 关于 c 的二次项恒为0
+'''
+def load_case_measures():
+    tables = load_tables()
+    if "case_area" not in tables:
+        midpoints = edge_offsets + 0.5 * axis_units[edge_axis]
+        case_area = np.zeros(256)
+        case_det = np.zeros(256)
+        case_normal = np.zeros((256, 3))
+        for case in range(256):
+            entries = tables["triangle"][case]
+            tri = midpoints[entries[entries >= 0]].reshape(-1, 3, 3)
+            normals = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+            case_area[case] = 0.5 * np.sqrt((normals * normals).sum(axis=1)).sum()
+            case_det[case] = np.einsum("ij,ij->i", tri[:, 0], np.cross(tri[:, 1], tri[:, 2])).sum()
+            case_normal[case] = normals.sum(axis=0)
+        tables["case_area"] = case_area
+        tables["case_det"] = case_det
+        tables["case_normal"] = case_normal
+    return tables
+
+def measure_cells_midpoint(cell_ids, cases, shape, x0):
+    tables = load_case_measures()
+    coords = cell_coords_from_ids(cell_ids, shape).astype(np.float64)
+    coords[:, 0] += x0
+    counts = np.bincount(cases, minlength=256)
+    coord_sums = np.stack([np.bincount(cases, weights=coords[:, k], minlength=256) for k in range(3)], axis=1)
+    area = (counts * tables["case_area"]).sum()
+    volume = ((counts * tables["case_det"]).sum() + (coord_sums * tables["case_normal"]).sum()) / 6.0
+    return area, volume
+
+def measure_cells_interpolated(slab, cell_ids, cases, isovalue, x0):
+    tables = load_tables()
+    entries = tables["triangle"][cases]
+    mask = entries >= 0
+    local_edges = entries[mask].astype(np.int64)
+    coords = np.repeat(cell_coords_from_ids(cell_ids, slab.shape), tables["triangle_count"][cases] * 3, axis=0)
+    points = coords + edge_offsets[local_edges]
+    axis = edge_axis[local_edges]
+    others = points + axis_units[axis]
+    value0 = slab[points[:, 0], points[:, 1], points[:, 2]]
+    value1 = slab[others[:, 0], others[:, 1], others[:, 2]]
+    positions = interpolate_points(points, axis, value0, value1, isovalue)
+    positions[:, 0] += x0
+    tri = positions.reshape(-1, 3, 3)
+    normals = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+    area = 0.5 * np.sqrt((normals * normals).sum(axis=1)).sum()
+    volume = np.einsum("ij,ij->i", tri[:, 0], np.cross(tri[:, 1], tri[:, 2])).sum() / 6.0
+    return area, volume
+
+'''
+    不生成网格的统计: 按 x 分片遍历, 返回 {"triangles", "active_cells", "area", "volume"}.
+    triangles 只查每种配置的三角形数; midpoint=True 时面积/体积也完全由每种配置的预计算贡献累加,
+    否则在每片内按条目插值累加, 不分配顶点/索引缓冲.
+    volume 为 value < isovalue 区域的有向体积, 区域碰到体数据边界(网格不封闭)时没有意义.
+'''
+def measure_surface(volume, isovalue=0.0, slab_size=32, midpoint=False):
+    volume = np.asarray(volume)
+    if volume.ndim != 3 or min(volume.shape) < 2:
+        raise ValueError("measure_surface: volume must be 3D with at least 2 samples per axis, got shape {shape}".format(shape=volume.shape))
+    triangle_count = load_tables()["triangle_count"]
+    measures = {"triangles": 0, "active_cells": 0, "area": 0.0, "volume": 0.0}
+    for x0 in range(0, volume.shape[0] - 1, slab_size):
+        slab = volume[x0:min(x0 + slab_size, volume.shape[0] - 1) + 1]
+        cell_ids, cases = active_cells(classify_cells(below_isovalue(slab, isovalue)))
+        measures["triangles"] += int(triangle_count[cases].sum())
+        measures["active_cells"] += len(cell_ids)
+        if midpoint:
+            area, enclosed = measure_cells_midpoint(cell_ids, cases, slab.shape, x0)
+        else:
+            area, enclosed = measure_cells_interpolated(slab, cell_ids, cases, isovalue, x0)
+        measures["area"] += float(area)
+        measures["volume"] += float(enclosed)
+    return measures
+
+def load_transition_tables():
+    tables = load_tables()
+    if "transition" not in tables:
+        transition = np.array(lut.generate_transition_tables(), dtype=np.int8)
+        tables["transition"] = transition
+        tables["transition_count"] = (np.count_nonzero(transition >= 0, axis=1) // 3).astype(np.int64)
+        # 每条过渡边: 低端点在面内的 (i, j), 方向(0: i, 1: j), 是否为低分辨率边
+        edge_points = np.zeros((16, 2), dtype=np.int64)
+        edge_directions = np.zeros(16, dtype=np.int64)
+        for eindex in range(16):
+            p0 = lut.transition_vertices[lut.transition_edge2vertex[eindex][0]]
+            p1 = lut.transition_vertices[lut.transition_edge2vertex[eindex][1]]
+            edge_points[eindex] = (int(min(p0[0], p1[0])), int(min(p0[1], p1[1])))
+            edge_directions[eindex] = 0 if p0[0] != p1[0] else 1
+        tables["transition_edge_points"] = edge_points
+        tables["transition_edge_directions"] = edge_directions
+        tables["transition_edge_low"] = np.arange(16) >= 12
+    return tables
+
+transition_face_names = ["-x", "+x", "-y", "+y", "-z", "+z"]
+
+def compress_transition_layers(vertices, shape, transition_faces, width):
+    # 低分辨率边界层 [B-2, B] 压缩到 [B-2, B-width], 为过渡单元让出 [B-width, B]
+    for face in transition_faces:
+        axis = "xyz".index(face[1])
+        coords = vertices[:, axis]
+        if face[0] == "+":
+            start = shape[axis] - 3
+            layer = coords > start
+            coords[layer] = start + (coords[layer] - start) * ((2.0 - width) / 2.0)
+        else:
+            layer = coords < 2
+            coords[layer] = 2.0 - (2.0 - coords[layer]) * ((2.0 - width) / 2.0)
+    return vertices
+
+'''
+    带 LOD 过渡的提取: volume 为本块的全分辨率采样(每轴 2n+1 个点), 块内按 2 倍步长提取,
+    transition_faces 中列出的面(如 "+x")与全分辨率的相邻块相接:
+    1. 普通单元格在 volume[::2, ::2, ::2] 上提取, 坐标乘2回到全分辨率网格;
+    2. 这些面的边界层按 transition_width(低分辨率单元格宽度的比例)压缩;
+    3. 每个面上每 2x2 个全分辨率面单元配一个过渡单元, 高分辨率面的顶点与相邻块在该面上的顶点完全相同,
+       低分辨率面的顶点直接复用普通单元格的顶点(按低分辨率边编号焊接), 因此不需要裙边.
+    返回 (vertices, faces), 坐标为全分辨率网格坐标.
+'''
+def extract_transition_surface(volume, isovalue=0.0, transition_faces=(), transition_width=0.5):
+    volume = np.asarray(volume)
+    if volume.ndim != 3 or min(volume.shape) < 3 or min([n % 2 for n in volume.shape]) == 0:
+        raise ValueError("extract_transition_surface: volume must be 3D with an odd number (>= 3) of samples per axis, got shape {shape}".format(shape=volume.shape))
+    for face in transition_faces:
+        if face not in transition_face_names:
+            raise ValueError("extract_transition_surface: unknown face {face}, expected one of {names}".format(face=face, names=transition_face_names))
+    if not 0.0 < transition_width < 1.0:
+        raise ValueError("extract_transition_surface: transition_width must be in (0, 1), got {width}".format(width=transition_width))
+    width = 2.0 * transition_width
+    low = volume[::2, ::2, ::2]
+    cell_ids, active_cases = active_cells(classify_cells(below_isovalue(low, isovalue)))
+    edge_ids = emit_cell_edges(cell_ids, active_cases, low.shape)
+    low_ids, faces = weld_edges(edge_ids, 3 * low.size)
+    vertices = interpolate_edges(low, low_ids, isovalue) * 2.0
+    vertices = compress_transition_layers(vertices, volume.shape, transition_faces, width)
+
+    tables = load_transition_tables()
+    full_size = volume.size
+    low_size = low.size
+    transition_ids = []
+    transition_low = []
+    for face in transition_faces:
+        axis = "xyz".index(face[1])
+        u_axis, v_axis = [k for k in range(3) if k != axis]
+        plane = volume.shape[axis] - 1 if face[0] == "+" else 0
+        inside = below_isovalue(np.take(volume, plane, axis=axis), isovalue)
+        nu = (inside.shape[0] - 1) // 2
+        nv = (inside.shape[1] - 1) // 2
+        cases = np.zeros((nu, nv), dtype=np.uint16)
+        for k in range(9):
+            i, j = k % 3, k // 3
+            cases |= inside[i:i + 2 * nu:2, j:j + 2 * nv:2].astype(np.uint16) << np.uint16(k)
+        cell_ids = np.flatnonzero((cases != 0) & (cases != 511))
+        cases = cases.reshape(-1)[cell_ids]
+        entries = tables["transition"][cases]
+        mask = entries >= 0
+        local_edges = entries[mask].astype(np.int64)
+        counts = tables["transition_count"][cases] * 3
+        cu = np.repeat(cell_ids // nv, counts)
+        cv = np.repeat(cell_ids % nv, counts)
+        direction = tables["transition_edge_directions"][local_edges]
+        axes = np.where(direction == 0, u_axis, v_axis)
+        points = tables["transition_edge_points"][local_edges]
+        is_low = tables["transition_edge_low"][local_edges]
+
+        full_points = np.zeros((len(local_edges), 3), dtype=np.int64)
+        full_points[:, axis] = plane
+        full_points[:, u_axis] = 2 * cu + points[:, 0]
+        full_points[:, v_axis] = 2 * cv + points[:, 1]
+        low_points = full_points // 2
+        full_linear = (full_points[:, 0] * volume.shape[1] + full_points[:, 1]) * volume.shape[2] + full_points[:, 2]
+        low_linear = (low_points[:, 0] * low.shape[1] + low_points[:, 1]) * low.shape[2] + low_points[:, 2]
+        ids = np.where(is_low, axes * low_size + low_linear, axes * full_size + full_linear)
+
+        # 映射 (i, j, z) -> 世界坐标的行列式为负时翻转绕向
+        frame = np.zeros((3, 3))
+        frame[:, 0] = axis_units[u_axis]
+        frame[:, 1] = axis_units[v_axis]
+        frame[:, 2] = axis_units[axis] * (1 if face[0] == "-" else -1)
+        if np.linalg.det(frame) < 0:
+            ids = ids.reshape(-1, 3)[:, ::-1].reshape(-1)
+            is_low = is_low.reshape(-1, 3)[:, ::-1].reshape(-1)
+        transition_ids.append(ids)
+        transition_low.append(is_low)
+
+    if not transition_faces:
+        return vertices, faces
+    all_ids = np.concatenate(transition_ids)
+    all_low = np.concatenate(transition_low)
+    high_unique = np.unique(all_ids[~all_low])
+    indices = np.empty(len(all_ids), dtype=np.int64)
+    indices[all_low] = np.searchsorted(low_ids, all_ids[all_low])
+    indices[~all_low] = len(low_ids) + np.searchsorted(high_unique, all_ids[~all_low])
+    high_vertices = interpolate_edges(volume, high_unique, isovalue)
+    return np.concatenate([vertices, high_vertices]), np.concatenate([faces, indices.reshape(-1, 3)])
+
+'''
+    二维切片等值线(Marching Squares), 查找表由 lut.generate_square_tables 生成.
+    图像按 image[x, y] 索引, 返回 (vertices (V, 2), segments (S, 2)),
+    全局边编号: axis * (X*Y) + 起点的线性索引. 线段右手侧为数值增大的一侧.
+'''
+square_corner_offsets = np.array(lut.square_vertices, dtype=np.int64)
+
+def load_square_tables():
+    tables = load_tables()
+    if "square" not in tables:
+        squares = np.array(lut.generate_square_tables(), dtype=np.int8)
+        edge_offsets_2d = np.zeros((4, 2), dtype=np.int64)
+        edge_axis_2d = np.zeros(4, dtype=np.int64)
+        for sindex in range(4):
+            v0, v1 = lut.square_edge2vertex[sindex]
+            edge_offsets_2d[sindex] = np.minimum(square_corner_offsets[v0], square_corner_offsets[v1])
+            edge_axis_2d[sindex] = int(np.argmax(np.abs(square_corner_offsets[v1] - square_corner_offsets[v0])))
+        tables["square"] = squares
+        tables["square_count"] = (np.count_nonzero(squares >= 0, axis=1) // 2).astype(np.int64)
+        tables["square_edge_offsets"] = edge_offsets_2d
+        tables["square_edge_axis"] = edge_axis_2d
+    return tables
+
+def extract_isolines(image, isovalue=0.0):
+    image = np.asarray(image)
+    if image.ndim != 2 or min(image.shape) < 2:
+        raise ValueError("extract_isolines: image must be 2D with at least 2 samples per axis, got shape {shape}".format(shape=image.shape))
+    tables = load_square_tables()
+    nx, ny = image.shape
+    bits = below_isovalue(image, isovalue).view(np.uint8)
+    cases = np.zeros((nx - 1, ny - 1), dtype=np.uint8)
+    for vindex in range(4):
+        ox, oy = square_corner_offsets[vindex]
+        cases |= bits[ox:ox + nx - 1, oy:oy + ny - 1] << vindex
+    cell_ids = np.flatnonzero((cases != 0) & (cases != 15))
+    active_cases = cases.reshape(-1)[cell_ids]
+    entries = tables["square"][active_cases]
+    counts = tables["square_count"][active_cases] * 2
+    cx, cy = np.divmod(cell_ids, ny - 1)
+    origins = cx * ny + cy
+    offsets = tables["square_edge_offsets"]
+    deltas = tables["square_edge_axis"] * image.size + offsets[:, 0] * ny + offsets[:, 1]
+    edge_ids = np.repeat(origins, counts) + deltas[entries[entries >= 0]]
+    unique_ids, segments = weld_edges(edge_ids, 2 * image.size, width=2)
+
+    axis = unique_ids // image.size
+    px, py = np.divmod(unique_ids % image.size, ny)
+    value0 = image[px, py]
+    value1 = image[px + (axis == 0), py + (axis == 1)]
+    vertices = np.stack([px, py], axis=1).astype(np.float64)
+    vertices[np.arange(len(axis)), axis] += edge_fractions(value0, value1, isovalue)
+    return vertices, segments
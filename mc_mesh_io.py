@@ -0,0 +1,139 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+import shutil
+import tempfile
+
+import numpy as np
+
+'''
+    网格写出: 二进制 PLY / 二进制 STL / OBJ 文本.
+    mesh 可以是 (vertices, faces) 元组, 也可以是 mc_extractor.extract_chunks 这类生成器,
+    每块 (vertices, faces) 中 faces 为整个流上的全局顶点编号.
+    带顶点法线的 (vertices, faces, normals) (extract_surface(..., normals=True)) 同样接受,
+    PLY 写出 nx/ny/nz, OBJ 写出 vn; STL 只有面法线, 顶点法线被忽略.
+    所有写出都按块整段写入(tofile / 整块格式化), 不逐三角形格式化.
+'''
+
+obj_block_rows = 1 << 16
+
+ply_face_dtype = np.dtype([("count", "u1"), ("indices", "<i4", (3,))])
+
+stl_face_dtype = np.dtype([("normal", "<f4", (3,)), ("points", "<f4", (3, 3)), ("attribute", "<u2")])
+
+def mesh_chunk(chunk):
+    # (vertices, faces) 或 (vertices, faces, normals) -> (vertices, faces, normals 或 None)
+    if len(chunk) not in (2, 3):
+        raise ValueError("mesh_chunk: expected (vertices, faces) or (vertices, faces, normals), got {count} items".format(count=len(chunk)))
+    vertices = np.asarray(chunk[0])
+    normals = np.asarray(chunk[2]) if len(chunk) == 3 else None
+    if normals is not None and normals.shape != vertices.shape:
+        raise ValueError("mesh_chunk: normals must match vertices, got {normals} and {vertices}".format(normals=normals.shape, vertices=vertices.shape))
+    return vertices, np.asarray(chunk[1]), normals
+
+def iter_mesh_chunks(mesh):
+    if isinstance(mesh, tuple) and len(mesh) in (2, 3) and np.ndim(mesh[0]) == 2:
+        yield mesh_chunk(mesh)
+        return
+    for chunk in mesh:
+        yield mesh_chunk(chunk)
+
+def ply_header(vertex_count, face_count, normals=False):
+    # 计数固定宽度, 流式写完后可以原位回填
+    return ("ply\n"
+        "format binary_little_endian 1.0\n"
+        "element vertex {vertex_count:>12d}\n"
+        "property float x\n"
+        "property float y\n"
+        "property float z\n"
+        + ("property float nx\n"
+        "property float ny\n"
+        "property float nz\n" if normals else "")
+        + "element face {face_count:>12d}\n"
+        "property list uchar int vertex_indices\n"
+        "end_header\n").format(vertex_count=vertex_count, face_count=face_count).encode("ascii")
+
+'''
+    PLY 要求所有顶点在面之前, 因此面数据先写入临时文件, 最后整体拷贝到顶点之后;
+    是否写法线由第一块决定, 之后每块必须一致
+'''
+def write_ply(path, mesh):
+    vertex_count = 0
+    face_count = 0
+    has_normals = None
+    with open(path, "wb") as fp, tempfile.TemporaryFile() as face_fp:
+        for vertices, faces, normals in iter_mesh_chunks(mesh):
+            if has_normals is None:
+                has_normals = normals is not None
+                fp.write(ply_header(0, 0, has_normals))
+            if has_normals != (normals is not None):
+                raise ValueError("write_ply: every chunk must either carry normals or not")
+            if has_normals:
+                vertices = np.concatenate([vertices, normals], axis=1)
+            np.ascontiguousarray(vertices, dtype="<f4").tofile(fp)
+            records = np.empty(len(faces), dtype=ply_face_dtype)
+            records["count"] = 3
+            records["indices"] = faces
+            records.tofile(face_fp)
+            vertex_count += len(vertices)
+            face_count += len(faces)
+        if has_normals is None:
+            fp.write(ply_header(0, 0))
+        face_fp.seek(0)
+        shutil.copyfileobj(face_fp, fp, 1 << 20)
+        fp.seek(0)
+        fp.write(ply_header(vertex_count, face_count, bool(has_normals)))
+    return vertex_count, face_count
+
+'''
+    STL 三角形直接携带坐标; 流式输入时 faces 只会引用前一块和当前块的顶点,
+    因此只保留这两块的顶点窗口
+'''
+def write_stl(path, mesh):
+    face_count = 0
+    window = np.zeros((0, 3), dtype=np.float32)
+    window_base = 0
+    with open(path, "wb") as fp:
+        fp.write(b"\0" * 80)
+        fp.write(np.array([0], dtype="<u4").tobytes())
+        for vertices, faces, vertex_normals in iter_mesh_chunks(mesh):
+            vertices = np.asarray(vertices, dtype=np.float32)
+            if len(faces) and faces.min() < window_base:
+                raise ValueError("write_stl: faces reference vertices older than the previous chunk")
+            window_next_base = window_base + len(window)
+            window = np.concatenate([window, vertices])
+            tri = window[faces - window_base]
+            normals = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+            lengths = np.sqrt((normals * normals).sum(axis=1))
+            lengths[lengths == 0] = 1.0
+            records = np.zeros(len(faces), dtype=stl_face_dtype)
+            records["normal"] = normals / lengths[:, None]
+            records["points"] = tri
+            records.tofile(fp)
+            face_count += len(faces)
+            window = vertices
+            window_base = window_next_base
+        fp.seek(80)
+        fp.write(np.array([face_count], dtype="<u4").tobytes())
+    return face_count
+
+def write_obj_rows(fp, prefix, fmt, rows):
+    for start in range(0, len(rows), obj_block_rows):
+        block = rows[start:start + obj_block_rows]
+        fp.write(((prefix + fmt + "\n") * len(block)) % tuple(block.ravel().tolist()))
+
+def write_obj(path, mesh, precision=6):
+    vertex_count = 0
+    face_count = 0
+    vertex_fmt = " ".join(["%.{precision}g".format(precision=precision)] * 3)
+    with open(path, "w", buffering=1 << 20) as fp:
+        for vertices, faces, normals in iter_mesh_chunks(mesh):
+            write_obj_rows(fp, "v ", vertex_fmt, np.asarray(vertices, dtype=np.float64))
+            if normals is None:
+                write_obj_rows(fp, "f ", "%d %d %d", np.asarray(faces, dtype=np.int64) + 1)
+            else:
+                # 法线与顶点一一对应, vn 编号与 v 编号相同
+                write_obj_rows(fp, "vn ", vertex_fmt, np.asarray(normals, dtype=np.float64))
+                write_obj_rows(fp, "f ", "%d//%d %d//%d %d//%d", np.repeat(np.asarray(faces, dtype=np.int64) + 1, 2, axis=1))
+            vertex_count += len(vertices)
+            face_count += len(faces)
+    return vertex_count, face_count